@@ -0,0 +1,306 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+plt = LazyImport('matplotlib.pyplot')
+
+# Maximum time (seconds) allowed for a cold import of each module in a fresh interpreter.
+# pandas/numpy are still imported eagerly, so the budgets leave headroom for them.
+IMPORT_BUDGETS = {
+    'df_info': 0.25,
+    'transformations': 1.5,
+    'plotter': 1.5,
+}
+
+# Modules that should not be imported as a side effect of importing the project modules.
+HEAVY_MODULES = ['scipy.stats', 'statsmodels', 'IPython', 'matplotlib.pyplot', 'missingno', 'seaborn', 'plotly.express', 'sklearn']
+
+_IMPORT_SNIPPET = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed)
+print(','.join(heavy))
+'''
+
+def time_import(module_name, repeats=3):
+    '''
+    Function to time a cold import of a module in a fresh Python interpreter.
+    The best of several runs is kept to reduce noise from the operating system.
+
+    Parameters:
+        module_name (str): Name of the module to import.
+        repeats (int): Number of fresh interpreters to time.
+
+    Returns:
+        best_time (float): Fastest import time in seconds.
+        heavy_loaded (list): Heavy dependencies found in sys.modules after the import.
+    '''
+    project_directory = os.path.dirname(os.path.abspath(__file__))
+    code = _IMPORT_SNIPPET.format(module=module_name, heavy=HEAVY_MODULES)
+    best_time = None
+    heavy_loaded = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], cwd=project_directory, capture_output=True, text=True, check=True).stdout.splitlines()
+        elapsed = float(output[0])
+        heavy_loaded = [name for name in output[1].split(',') if name] if len(output) > 1 else []
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    return best_time, heavy_loaded
+
+def import_time_benchmark(budgets=IMPORT_BUDGETS, repeats=3):
+    '''
+    Function to check the import time of each project module against its budget.
+    Raises an AssertionError if a module is over budget or eagerly imports a heavy dependency.
+
+    Parameters:
+        budgets (dict): Module name mapped to its import time budget in seconds.
+        repeats (int): Number of fresh interpreters to time for each module.
+
+    Returns:
+        results (dict): Module name mapped to its best import time in seconds.
+    '''
+    results = {}
+    failures = []
+    for module_name, budget in budgets.items():
+        elapsed, heavy_loaded = time_import(module_name, repeats)
+        results[module_name] = elapsed
+        print(f'import {module_name}: {elapsed:.3f} s (budget {budget:.2f} s)')
+        if elapsed > budget:
+            failures.append(f'{module_name} took {elapsed:.3f} s, budget is {budget:.2f} s')
+        if heavy_loaded:
+            failures.append(f'{module_name} eagerly imported: {", ".join(heavy_loaded)}')
+    assert not failures, '\n'.join(failures)
+    return results
+
+def _complete_duration(df):
+    # product_related_duration is one of the nullable synthetic columns, and the scipy transforms need finite data.
+    df['complete_duration'] = df['product_related_duration'].fillna(df['product_related_duration'].median())
+
+def _positive_duration(df):
+    # Box-Cox needs strictly positive (and finite) data.
+    _complete_duration(df)
+    df['positive_duration'] = df['complete_duration'] + 1
+
+def _timedelta_duration(df):
+    df['administrative_duration'] = pd.to_timedelta(df['administrative_duration'], unit='s')
+
+# Every public method of the project classes: (class name, method name, arguments, setup applied to the df copy before timing, largest number of rows to run at).
+# Plots that draw one marker per row are capped, as their cost is dominated by matplotlib rather than the project code.
+BENCHMARK_CALLS = [
+    ('DataTransform', 'to_category', ('month', 'operating_systems', 'browser', 'region', 'traffic_type', 'visitor_type'), None, None),
+    ('DataTransform', 'to_datetime', ('administrative_duration',), None, None),
+    ('DataTransform', 'to_Int', ('administrative',), None, None),
+    ('DataTransform', 'to_int', ('informational',), None, None),
+    ('DataTransform', 'to_total_seconds', ('administrative_duration',), _timedelta_duration, None),
+    ('DataFrameTransform', 'drop_columns', ('page_values',), None, None),
+    ('DataFrameTransform', 'drop_rows_from_columns', ('administrative_duration',), None, None),
+    ('DataFrameTransform', 'drop_negative_rows', ('administrative_duration',), None, None),
+    ('DataFrameTransform', 'drop_all_nulls', (), None, None),
+    ('DataFrameTransform', 'impute_mean', ('administrative_duration',), None, None),
+    ('DataFrameTransform', 'impute_median', ('administrative_duration',), None, None),
+    ('DataFrameTransform', 'impute_mode', ('operating_systems',), None, None),
+    ('DataFrameTransform', 'log_transformation', (['product_related_duration'],), None, None),
+    ('DataFrameTransform', 'yeo_or_boxcox_transformation', (['product_related_duration'],), None, None),
+    ('DataFrameTransform', 'replace_categories', ('browser', ['QQ', 'Sogou Explorer', 'Yandex', 'UC Browser', 'Undetermined'], 'Other'), None, None),
+    ('DataFrameTransform', 'segment_categories', ('TRAFFIC_SEGMENTS',), None, None),
+    ('DataFrameTransform', 'segment_counts', ('OPERATING_SYSTEM_SEGMENTS',), None, None),
+    ('DataFrameTransform', 'top_k', ('administrative_duration', 5), None, None),
+    ('DataFrameTransform', 'group_top_k', ('region', 'bounce_rates'), None, None),
+    ('DataFrameInfo', 'df_data_type', (), None, None),
+    ('DataFrameInfo', 'df_stats', (), None, None),
+    ('DataFrameInfo', 'df_category_distinct_values', (), None, None),
+    ('DataFrameInfo', 'df_shape', (), None, None),
+    ('DataFrameInfo', 'df_null_info', (), None, None),
+    ('Plotter', 'missing_no_matrix', (), None, None),
+    ('Plotter', 'missing_no_bar', (), None, None),
+    ('Plotter', 'missing_no_heatmap', (), None, None),
+    ('Plotter', 'probability_distribution', ('region',), None, None),
+    ('Plotter', 'correlation', ('bounce_rates', 'exit_rates'), None, None),
+    ('Plotter', 'correlation_matrix', (), None, None),
+    ('Plotter', 'k2_test', ('page_values',), None, None),
+    ('Plotter', 'normality_tests', (), None, None),
+    ('Plotter', 'qq_plot', ('page_values',), None, None),
+    ('Plotter', 'histogram', ('product_related_duration',), None, None),
+    ('Plotter', 'density_plot', ('product_related_duration',), None, None),
+    ('Plotter', 'boxplot', ('product_related_duration',), None, 1000000),
+    ('Plotter', 'cumulative_distribution_function', ('product_related_duration',), None, None),
+    ('Plotter', 'distribution_plots', ('product_related_duration',), None, None),
+    ('Plotter', 'scatter', ('bounce_rates', 'exit_rates'), None, 1000000),
+    ('Plotter', 'chi_squared', ('administrative_duration', 'region'), None, None),
+    ('Plotter', 'chi_squared_all', (), None, None),
+    ('Plotter', 'log_transformation', ('product_related_duration',), None, None),
+    ('Plotter', 'boxcox', ('positive_duration',), _positive_duration, None),
+    ('Plotter', 'yeojohnson', ('complete_duration',), _complete_duration, None),
+    ('Plotter', 'skew_subplots', ('positive_duration',), _positive_duration, None),
+    ('Plotter', 'pairplot', (['bounce_rates', 'exit_rates', 'page_values'],), None, 100000),
+    ('Plotter', 'count_plot', (['region', 'visitor_type'],), None, 1000000),
+]
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+def _project_classes():
+    from df_info import DataFrameInfo
+    from plotter import Plotter
+    from transformations import DataFrameTransform, DataTransform
+    return {'DataTransform': DataTransform, 'DataFrameTransform': DataFrameTransform, 'DataFrameInfo': DataFrameInfo, 'Plotter': Plotter}
+
+def _resolve_arguments(arguments):
+    # Segment taxonomies are named in BENCHMARK_CALLS and looked up here, so segments.py is only imported when benchmarking.
+    import segments
+    return tuple(getattr(segments, argument) if isinstance(argument, str) and argument.endswith('_SEGMENTS') else argument for argument in arguments)
+
+def _run_call(df, class_name, method_name, arguments, setup, measure_memory):
+    classes = _project_classes()
+    # Methods may change the df in place, so each run gets its own copy (not included in the timings).
+    df = df.copy()
+    if setup is not None:
+        setup(df)
+    instance = classes[class_name](df)
+    method = getattr(instance, method_name)
+    arguments = _resolve_arguments(arguments)
+    if measure_memory:
+        tracemalloc.start()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        method(*arguments)
+    wall_time = time.perf_counter() - start_wall
+    cpu_time = time.process_time() - start_cpu
+    peak_memory = None
+    if measure_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    plt.close('all')
+    return wall_time, cpu_time, peak_memory
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=3, output_path=None, methods=None, seed=0, null_rate=0.01):
+    '''
+    Function to time and memory-profile every public method of DataTransform, DataFrameTransform, DataFrameInfo and Plotter on synthetic customer_activity data of several sizes.
+    Wall time and CPU time are the best of several runs. Peak memory is measured with tracemalloc in a separate run, as tracing slows the code down.
+
+    Parameters:
+        sizes (list of int): Numbers of rows to benchmark at.
+        repeats (int): Number of timed runs of each method at each size.
+        output_path (str): Path of a .json file to save the results to (not saved if None).
+        methods (list of str): 'Class.method' names to run (defaults to all of BENCHMARK_CALLS).
+        seed (int): Seed for the synthetic data.
+        null_rate (float): Fraction of null values in the nullable columns of the synthetic data.
+
+    Returns:
+        results (dict): Metadata about the run and a list of results, one per method and size.
+    '''
+    import matplotlib
+    # Draw plots off-screen so plt.show() does not block.
+    matplotlib.use('Agg')
+    from synthetic_data import generate_customer_activity
+
+    results = []
+    for size in sizes:
+        df = generate_customer_activity(size, seed=seed, null_rate=null_rate)
+        for class_name, method_name, arguments, setup, max_rows in BENCHMARK_CALLS:
+            name = f'{class_name}.{method_name}'
+            if methods is not None and name not in methods:
+                continue
+            result = {'method': name, 'rows': size}
+            if max_rows is not None and size > max_rows:
+                result['skipped'] = f'only run up to {max_rows} rows'
+                results.append(result)
+                continue
+            try:
+                timings = [_run_call(df, class_name, method_name, arguments, setup, False) for _ in range(repeats)]
+                result['wall_time'] = min(timing[0] for timing in timings)
+                result['cpu_time'] = min(timing[1] for timing in timings)
+                result['peak_memory'] = _run_call(df, class_name, method_name, arguments, setup, True)[2]
+                result['rows_per_second'] = size / result['wall_time'] if result['wall_time'] > 0 else None
+            except Exception as error:
+                result['error'] = f'{type(error).__name__}: {error}'
+            print(_format_result(result))
+            results.append(result)
+    report = {'metadata': _metadata(), 'results': results}
+    if output_path is not None:
+        with open(output_path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'Results saved to {output_path}')
+    return report
+
+def _format_result(result):
+    if 'error' in result:
+        return f"{result['method']} ({result['rows']} rows): {result['error']}"
+    if 'skipped' in result:
+        return f"{result['method']} ({result['rows']} rows): skipped, {result['skipped']}"
+    return f"{result['method']} ({result['rows']} rows): {result['wall_time']:.4f} s wall, {result['cpu_time']:.4f} s CPU, {result['peak_memory'] / 2 ** 20:.1f} MiB peak"
+
+def _metadata():
+    versions = {}
+    for module_name in ['numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'sklearn']:
+        try:
+            versions[module_name] = __import__(module_name).__version__
+        except ImportError:
+            versions[module_name] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'versions': versions,
+    }
+
+def compare_benchmarks(baseline_path, current_path, threshold=1.25):
+    '''
+    Function to compare two saved benchmark runs and report methods that became slower or used more memory.
+
+    Parameters:
+        baseline_path (str): Path of the .json results of the earlier version.
+        current_path (str): Path of the .json results of the current version.
+        threshold (float): Ratio of current to baseline above which a result counts as a regression.
+
+    Returns:
+        regressions (list of dict): Method, rows, metric, baseline and current values of each regression.
+    '''
+    with open(baseline_path) as file:
+        baseline = {(result['method'], result['rows']): result for result in json.load(file)['results']}
+    with open(current_path) as file:
+        current = {(result['method'], result['rows']): result for result in json.load(file)['results']}
+    regressions = []
+    for key in sorted(baseline.keys() & current.keys()):
+        for metric in ['wall_time', 'peak_memory']:
+            before, after = baseline[key].get(metric), current[key].get(metric)
+            if before and after and after / before > threshold:
+                regressions.append({'method': key[0], 'rows': key[1], 'metric': metric, 'baseline': before, 'current': after})
+                print(f'{key[0]} ({key[1]} rows): {metric} {before:.4g} -> {after:.4g} ({after / before:.2f}x)')
+    if not regressions:
+        print('No regressions found.')
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the import time and methods of the project modules.')
+    parser.add_argument('--imports', action='store_true', help='only check the import time budgets')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='numbers of rows of synthetic data')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs of each method')
+    parser.add_argument('--methods', nargs='+', help='Class.method names to run (default: all)')
+    parser.add_argument('--output', help='path of a .json file to save the results to')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two saved .json results')
+    args = parser.parse_args()
+    if args.compare:
+        compare_benchmarks(*args.compare)
+    else:
+        import_time_benchmark()
+        if not args.imports:
+            run_benchmarks(args.sizes, args.repeats, args.output, args.methods)
@@ -0,0 +1,137 @@
+from statistics import NormalDist
+import numpy as np
+from cube import AggregateCube
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+# Dimensions the analysis compares conversion (revenue) rates across.
+DEFAULT_DIMENSIONS = ['region', 'visitor_type', 'traffic_type', 'month', 'weekend']
+
+# Number of resamples drawn at once, to bound the memory of each multinomial draw.
+_RESAMPLE_BATCH = 1000
+
+def wilson_interval(conversions, sessions, confidence=0.95):
+    '''
+    Function to calculate the Wilson score interval for conversion rates.
+
+    Parameters:
+        conversions (np.ndarray): Number of conversions in each segment.
+        sessions (np.ndarray): Number of sessions in each segment.
+        confidence (float): Confidence level of the interval.
+
+    Returns:
+        low, high (np.ndarray): Bounds of the interval for each segment.
+    '''
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    sessions = np.asarray(sessions, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.asarray(conversions, dtype=np.float64) / sessions
+        denominator = 1 + z ** 2 / sessions
+        centre = (rate + z ** 2 / (2 * sessions)) / denominator
+        half_width = z * np.sqrt(rate * (1 - rate) / sessions + z ** 2 / (4 * sessions ** 2)) / denominator
+    return centre - half_width, centre + half_width
+
+def _bootstrap_rates(conversions, failures, n_resamples, seed):
+    '''
+    Function to draw bootstrap resamples of the whole dataset and return the conversion rate of each segment in each resample.
+    Resampling every session with replacement is equivalent to one multinomial draw over the (segment, converted) cells, so each batch of resamples is a single np.random.multinomial call.
+
+    Parameters:
+        conversions (np.ndarray): Number of conversions in each segment.
+        failures (np.ndarray): Number of sessions without a conversion in each segment.
+        n_resamples (int): Number of resamples.
+        seed (int/np.random.SeedSequence): Seed for the random number generator.
+
+    Returns:
+        np.ndarray of shape (n_resamples, number of segments).
+    '''
+    rng = np.random.default_rng(seed)
+    cells = np.concatenate([conversions, failures]).astype(np.float64)
+    total = int(cells.sum())
+    n_segments = len(conversions)
+    rates = np.empty((n_resamples, n_segments))
+    for start in range(0, n_resamples, _RESAMPLE_BATCH):
+        size = min(_RESAMPLE_BATCH, n_resamples - start)
+        draws = rng.multinomial(total, cells / total, size=size)
+        resampled_conversions = draws[:, :n_segments]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates[start:start + size] = resampled_conversions / (resampled_conversions + draws[:, n_segments:])
+    return rates
+
+def bootstrap_interval(conversions, failures, confidence=0.95, n_resamples=2000, max_workers=None, seed=0):
+    '''
+    Function to calculate percentile bootstrap intervals for the conversion rate of each segment.
+    For large resample counts the resamples can be split across worker processes, each with an independent random stream.
+
+    Parameters:
+        conversions (np.ndarray): Number of conversions in each segment.
+        failures (np.ndarray): Number of sessions without a conversion in each segment.
+        confidence (float): Confidence level of the interval.
+        n_resamples (int): Number of resamples.
+        max_workers (int): Number of worker processes. Resamples are drawn in this process if None.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        low, high (np.ndarray): Bounds of the interval for each segment.
+    '''
+    conversions = np.asarray(conversions, dtype=np.int64)
+    failures = np.asarray(failures, dtype=np.int64)
+    if conversions.sum() + failures.sum() == 0:
+        return np.full(len(conversions), np.nan), np.full(len(conversions), np.nan)
+    if max_workers is None or max_workers <= 1:
+        rates = _bootstrap_rates(conversions, failures, n_resamples, seed)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        seeds = np.random.SeedSequence(seed).spawn(max_workers)
+        sizes = [n_resamples // max_workers + (worker < n_resamples % max_workers) for worker in range(max_workers)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_bootstrap_rates, conversions, failures, size, worker_seed) for size, worker_seed in zip(sizes, seeds) if size]
+            rates = np.concatenate([future.result() for future in futures])
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanquantile(rates, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+def conversion_rates(df_name, dimensions=None, outcome='revenue', success=True, confidence=0.95, n_resamples=2000, max_workers=None, seed=0):
+    '''
+    Function to calculate the conversion rate of every segment of every dimension, with Wilson and bootstrap confidence intervals.
+    The df is scanned once (to build an AggregateCube); every dimension is then answered from the cube.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        dimensions (list of str): Categorical column headers to break the conversion rate down by (defaults to DEFAULT_DIMENSIONS).
+        outcome (str): Column header of the outcome, e.g. 'revenue'.
+        success (object): Value of the outcome column counted as a conversion.
+        confidence (float): Confidence level of the intervals.
+        n_resamples (int): Number of bootstrap resamples (no bootstrap intervals if 0).
+        max_workers (int): Number of worker processes for the bootstrap.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        Pandas df with one row per segment (dimension, segment, sessions, conversions, conversion_rate, interval bounds), ranked by conversion rate within each dimension.
+    '''
+    dimensions = list(DEFAULT_DIMENSIONS if dimensions is None else dimensions)
+    aggregate = AggregateCube(df_name, dimensions + [outcome])
+    tables = []
+    for position, dimension in enumerate(dimensions):
+        sessions = aggregate.counts(dimension)
+        conversions = aggregate.counts(dimension, where={outcome: success}).reindex(sessions.index, fill_value=0)
+        # Rows with a null outcome are not sessions with a known result.
+        known = aggregate.counts(dimension, where={outcome: list(aggregate.labels[outcome])}).reindex(sessions.index, fill_value=0)
+        table = pd.DataFrame({
+            'dimension': dimension,
+            'segment': sessions.index.astype(object),
+            'sessions': known.to_numpy(),
+            'conversions': conversions.to_numpy(),
+        })
+        table['conversion_rate'] = table['conversions'] / table['sessions']
+        table['wilson_low'], table['wilson_high'] = wilson_interval(table['conversions'].to_numpy(), table['sessions'].to_numpy(), confidence)
+        if n_resamples:
+            table['bootstrap_low'], table['bootstrap_high'] = bootstrap_interval(
+                table['conversions'].to_numpy(), (table['sessions'] - table['conversions']).to_numpy(),
+                confidence, n_resamples, max_workers, seed + position)
+        tables.append(table.sort_values('conversion_rate', ascending=False, kind='stable'))
+    result = pd.concat(tables, ignore_index=True)
+    result.insert(2, 'rank', result.groupby('dimension', sort=False).cumcount() + 1)
+    return result
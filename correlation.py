@@ -0,0 +1,227 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+class CorrelationAccumulator():
+    '''
+    This class is used to calculate a correlation matrix over a dataset one chunk at a time.
+    Each chunk is reduced to counts, means and co-moments for every pair of columns, which can be merged with the accumulators of other chunks or worker processes.
+
+    ------------------
+    Parameters:
+    columns: list of str
+        Numeric column headers to correlate.
+    method: str
+        'pearson' or 'spearman'.
+    pairwise: bool
+        If True each pair of columns uses every row where both values are present, otherwise only rows with no null values are used.
+    rank_reference: dict (required for 'spearman')
+        Column header mapped to a sorted sample of that column's values, used to convert values to approximate ranks.
+
+    ------------------
+    Attributes:
+    count: np.ndarray
+        count[i, j] is the number of rows where columns i and j are both present.
+    mean: np.ndarray
+        mean[i, j] is the mean of column i over the rows where columns i and j are both present.
+    comoment: np.ndarray
+        comoment[i, j] is the sum of products of deviations from the mean of columns i and j.
+    m2: np.ndarray
+        m2[i, j] is the sum of squared deviations from the mean of column i over the rows where columns i and j are both present.
+
+    ------------------
+    Methods:
+    update()
+        Adds a chunk of data (Pandas df) to the accumulator.
+    merge()
+        Combines another accumulator into this one.
+    correlation()
+        Returns the correlation matrix of the data accumulated so far.
+    '''
+    def __init__(self, columns, method='pearson', pairwise=True, rank_reference=None):
+        if method not in ('pearson', 'spearman'):
+            raise ValueError("method must be 'pearson' or 'spearman'")
+        if method == 'spearman' and rank_reference is None:
+            raise ValueError("rank_reference is required for the 'spearman' method")
+        self.columns = list(columns)
+        self.method = method
+        self.pairwise = pairwise
+        self.rank_reference = rank_reference
+        k = len(self.columns)
+        self.count = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+
+    def _values(self, chunk):
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.method == 'spearman':
+            for position, column in enumerate(self.columns):
+                values[:, position] = approximate_ranks(values[:, position], self.rank_reference[column])
+        if not self.pairwise:
+            values = values[~np.isnan(values).any(axis=1)]
+        return values
+
+    def update(self, chunk):
+        '''
+        This method adds a chunk of data to the accumulator.
+
+        Parameters:
+            chunk (Pandas df): Pandas df containing (at least) the accumulator's columns.
+
+        Returns:
+            The accumulator, to allow chaining.
+        '''
+        values = self._values(chunk)
+        present = ~np.isnan(values)
+        n_present = present.sum(axis=0)
+        # Shifting by the chunk mean leaves the co-moments unchanged and avoids cancellation in the raw sums below.
+        shift = np.where(present, values, 0.0).sum(axis=0) / np.maximum(n_present, 1)
+        shifted = np.where(present, values - shift, 0.0)
+        mask = present.astype(np.float64)
+
+        count = mask.T @ mask
+        sums = shifted.T @ mask
+        with np.errstate(divide='ignore', invalid='ignore'):
+            comoment = shifted.T @ shifted - np.where(count > 0, sums * sums.T / count, 0.0)
+            m2 = (shifted ** 2).T @ mask - np.where(count > 0, sums ** 2 / count, 0.0)
+            mean = np.where(count > 0, sums / count, 0.0) + shift[:, None]
+        self._combine(count, mean, comoment, m2)
+        return self
+
+    def merge(self, other):
+        '''
+        This method combines another accumulator (e.g. from another chunk or worker process) into this one.
+
+        Parameters:
+            other (CorrelationAccumulator): Accumulator over the same columns, method and null handling.
+
+        Returns:
+            The accumulator, to allow chaining.
+        '''
+        if other.columns != self.columns or other.method != self.method or other.pairwise != self.pairwise:
+            raise ValueError('Only accumulators with the same columns, method and null handling can be merged.')
+        self._combine(other.count, other.mean, other.comoment, other.m2)
+        return self
+
+    def _combine(self, count, mean, comoment, m2):
+        # Pairwise update of Chan et al. for combining the moments of two sets of rows.
+        total = self.count + count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total > 0, self.count * count / total, 0.0)
+            delta = mean - self.mean
+            self.mean = self.mean + delta * np.where(total > 0, count / total, 0.0)
+        self.comoment = self.comoment + comoment + delta * delta.T * weight
+        self.m2 = self.m2 + m2 + delta ** 2 * weight
+        self.count = total
+
+    def correlation(self):
+        '''
+        This method returns the correlation matrix of the data accumulated so far.
+
+        Returns:
+            Pandas df holding the correlation matrix.
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        correlation = np.clip(correlation, -1, 1)
+        # Pairs with fewer than two shared rows have no defined correlation.
+        correlation[self.count < 2] = np.nan
+        return pd.DataFrame(correlation, index=self.columns, columns=self.columns)
+
+def approximate_ranks(values, reference):
+    '''
+    Function to convert values to approximate fractional ranks using a sorted reference sample of the same column.
+    Tied values receive the average of their ranks. If the reference holds every value of the column the ranks are exact.
+
+    Parameters:
+        values (np.ndarray): Values to rank (nulls are kept as nan).
+        reference (np.ndarray): Sorted sample of the column's non-null values.
+
+    Returns:
+        np.ndarray of ranks scaled to the range 0 to 1.
+    '''
+    lower = np.searchsorted(reference, values, side='left')
+    upper = np.searchsorted(reference, values, side='right')
+    ranks = (lower + upper) / (2.0 * max(len(reference), 1))
+    return np.where(np.isnan(values), np.nan, ranks)
+
+def rank_reference(chunks, columns, sample_size=100000, seed=0):
+    '''
+    Function to draw a uniform random sample of each column's non-null values across all chunks, in one pass.
+    Each value is given a random key and the values with the smallest keys are kept, so samples from different chunks can be merged.
+
+    Parameters:
+        chunks (iterable of Pandas df): The data, one chunk at a time.
+        columns (list of str): Column headers to sample.
+        sample_size (int): Maximum number of values kept for each column.
+        seed (int): Seed for the random number generator.
+
+    Returns:
+        Dictionary of column header mapped to a sorted sample of that column's values.
+    '''
+    rng = np.random.default_rng(seed)
+    samples = {column: (np.empty(0), np.empty(0)) for column in columns}
+    for chunk in chunks:
+        for column in columns:
+            values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            kept_values, kept_keys = samples[column]
+            values = np.concatenate([kept_values, values])
+            keys = np.concatenate([kept_keys, rng.random(len(values) - len(kept_values))])
+            if len(values) > sample_size:
+                keep = np.argpartition(keys, sample_size)[:sample_size]
+                values, keys = values[keep], keys[keep]
+            samples[column] = (values, keys)
+    return {column: np.sort(values) for column, (values, keys) in samples.items()}
+
+def _accumulate(chunk, columns, method, pairwise, reference):
+    # Module-level so it can be sent to worker processes.
+    return CorrelationAccumulator(columns, method, pairwise, reference).update(chunk)
+
+def _split(df_name, chunk_size):
+    return [df_name.iloc[start:start + chunk_size] for start in range(0, len(df_name), chunk_size)]
+
+def correlation_matrix(data, method='pearson', pairwise=True, chunk_size=None, max_workers=None, sample_size=100000):
+    '''
+    Function to calculate the correlation matrix between all numeric columns of a df or of a sequence of df chunks.
+    Non-numeric columns are ignored. Chunks are reduced to CorrelationAccumulators, optionally in worker processes, and then merged.
+
+    Parameters:
+        data (Pandas df or list of Pandas df): The data, as one df or as chunks with the same columns.
+        method (str): 'pearson' or 'spearman'. Spearman uses ranks estimated from a sample of sample_size values per column.
+        pairwise (bool): If True each pair of columns uses every row where both values are present, otherwise only rows with no null values are used.
+        chunk_size (int): Number of rows per chunk when data is a single df.
+        max_workers (int): Number of worker processes. Chunks are processed in this process if None.
+        sample_size (int): Number of values per column used to estimate ranks for the 'spearman' method.
+
+    Returns:
+        Pandas df holding the correlation matrix.
+    '''
+    if isinstance(data, pd.DataFrame):
+        chunks = _split(data, chunk_size) if chunk_size else [data]
+    else:
+        chunks = data
+        if method == 'spearman' and iter(chunks) is chunks:
+            raise ValueError("The 'spearman' method reads the data twice, so chunks must be a list rather than an iterator.")
+    chunk_iterator = iter(chunks)
+    first_chunk = next(chunk_iterator, None)
+    if first_chunk is None:
+        raise ValueError('No data to correlate.')
+    columns = list(first_chunk.select_dtypes(include=['number', 'bool']).columns)
+
+    reference = rank_reference(chunks, columns, sample_size) if method == 'spearman' else None
+    accumulator = CorrelationAccumulator(columns, method, pairwise, reference)
+    if max_workers is None:
+        accumulator.update(first_chunk)
+        for chunk in chunk_iterator:
+            accumulator.update(chunk)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_accumulate, first_chunk, columns, method, pairwise, reference)]
+            futures += [executor.submit(_accumulate, chunk, columns, method, pairwise, reference) for chunk in chunk_iterator]
+            for future in futures:
+                accumulator.merge(future.result())
+    return accumulator.correlation()
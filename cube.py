@@ -0,0 +1,195 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+# Categorical dimensions of the customer_activity dataset.
+DEFAULT_DIMENSIONS = ['region', 'traffic_type', 'month', 'browser', 'operating_systems', 'visitor_type', 'weekend', 'revenue']
+
+# Largest number of cube cells counted with a dense np.bincount before switching to np.unique.
+_DENSE_CELL_LIMIT = 1 << 24
+
+def _codes_and_labels(series):
+    # Integer code of each value (-1 for nulls) and the label of each code, in sorted order.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), pd.Index(series.cat.categories)
+    codes, labels = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), pd.Index(labels)
+
+class AggregateCube():
+    '''
+    This class is used to pre-aggregate a df over its categorical dimensions, so group-by queries can be answered without rescanning the df.
+    Counts (and sums of any measures) are calculated in one pass with np.bincount over a single code combining every dimension.
+    Only occupied cells of the cube are kept, so queries only touch as many cells as there are distinct combinations of dimension values.
+
+    ------------------
+    Parameters:
+    df_name: Pandas df
+        A Pandas dataframe
+    dimensions: list of str
+        Categorical column headers to aggregate over (defaults to DEFAULT_DIMENSIONS).
+    measures: list of str
+        Numeric column headers to sum (optional).
+
+    ------------------
+    Attributes:
+    dimensions: list of str
+        Categorical column headers.
+    measures: list of str
+        Numeric column headers.
+    labels: dict
+        Dimension mapped to a Pandas Index of its values.
+    n_cells: int
+        Number of occupied cells.
+
+    ------------------
+    Methods:
+    counts()
+        Returns the number of rows in each group, like df.groupby(by).size().
+    sums()
+        Returns the sum of a measure in each group.
+    means()
+        Returns the mean of a measure in each group.
+    value_counts()
+        Returns the (optionally normalised) value counts of a dimension within each group, like df.groupby(by)[column].value_counts().
+    '''
+    def __init__(self, df_name, dimensions=None, measures=None):
+        self.dimensions = list(DEFAULT_DIMENSIONS if dimensions is None else dimensions)
+        self.measures = list(measures or [])
+        self.labels = {}
+        codes = []
+        for dimension in self.dimensions:
+            dimension_codes, self.labels[dimension] = _codes_and_labels(df_name[dimension])
+            # Nulls get their own level (the last one) so they are kept in roll-ups over other dimensions.
+            dimension_codes[dimension_codes < 0] = len(self.labels[dimension])
+            codes.append(dimension_codes)
+        self._sizes = tuple(len(self.labels[dimension]) + 1 for dimension in self.dimensions)
+        n_cells = int(np.prod(self._sizes, dtype=np.float64))
+        if n_cells >= 2 ** 62:
+            raise ValueError('Too many combinations of dimension values to build a cube.')
+        combined = np.ravel_multi_index(codes, self._sizes) if codes else np.zeros(len(df_name), dtype=np.int64)
+
+        weights = {}
+        for measure in self.measures:
+            values = df_name[measure].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            weights[measure] = np.where(present, values, 0.0)
+            weights[f'{measure}__present'] = present.astype(np.float64)
+
+        if n_cells <= _DENSE_CELL_LIMIT:
+            counts = np.bincount(combined, minlength=n_cells)
+            cells = np.flatnonzero(counts)
+            self._counts = counts[cells]
+            self._sums = {name: np.bincount(combined, weights=weight, minlength=n_cells)[cells] for name, weight in weights.items()}
+        else:
+            cells, inverse = np.unique(combined, return_inverse=True)
+            self._counts = np.bincount(inverse)
+            self._sums = {name: np.bincount(inverse, weights=weight) for name, weight in weights.items()}
+        self.n_cells = len(cells)
+        self._cell_codes = dict(zip(self.dimensions, np.unravel_index(cells, self._sizes)))
+
+    def _cell_mask(self, by, where):
+        # Cells matching the where filter whose by dimensions are not null.
+        mask = np.ones(self.n_cells, dtype=bool)
+        for dimension, values in (where or {}).items():
+            if not isinstance(values, (list, tuple, set, np.ndarray, pd.Index)):
+                values = [values]
+            allowed = self.labels[dimension].get_indexer(list(values))
+            mask &= np.isin(self._cell_codes[dimension], allowed[allowed >= 0])
+        for dimension in by:
+            mask &= self._cell_codes[dimension] < len(self.labels[dimension])
+        return mask
+
+    def _aggregate(self, cell_values, by, where, name):
+        '''
+        Function to roll the cells up to the by dimensions.
+
+        Parameters:
+            cell_values (np.ndarray): Value held by each cell (e.g. its count).
+            by (str or list of str): Dimension(s) to group by.
+            where (dict): Dimension mapped to the value (or list of values) to keep.
+            name (str): Name of the returned Series.
+
+        Returns:
+            Pandas Series indexed by the labels of the occupied groups (a float if by is empty).
+        '''
+        by = [by] if isinstance(by, str) else list(by or [])
+        mask = self._cell_mask(by, where)
+        if not by:
+            return cell_values[mask].sum()
+        sizes = tuple(len(self.labels[dimension]) for dimension in by)
+        group = np.ravel_multi_index([self._cell_codes[dimension][mask] for dimension in by], sizes)
+        n_groups = int(np.prod(sizes))
+        totals = np.bincount(group, weights=cell_values[mask], minlength=n_groups)
+        occupied = np.flatnonzero(np.bincount(group, minlength=n_groups))
+        group_codes = np.unravel_index(occupied, sizes)
+        index = pd.MultiIndex.from_arrays([self.labels[dimension].take(codes) for dimension, codes in zip(by, group_codes)], names=by)
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.Series(totals[occupied], index=index, name=name)
+
+    def counts(self, by=None, where=None):
+        '''
+        This method returns the number of rows in each group, like df.groupby(by).size().
+
+        Parameters:
+            by (str or list of str): Dimension(s) to group by. The total count is returned if None.
+            where (dict): Dimension mapped to the value (or list of values) to keep, e.g. {'revenue': True}.
+
+        Returns:
+            Pandas Series of counts.
+        '''
+        result = self._aggregate(self._counts.astype(np.float64), by, where, 'count')
+        return result.astype(np.int64) if isinstance(result, pd.Series) else int(result)
+
+    def sums(self, measure, by=None, where=None):
+        '''
+        This method returns the sum of a measure in each group, like df.groupby(by)[measure].sum().
+
+        Parameters:
+            measure (str): Measure column header.
+            by (str or list of str): Dimension(s) to group by.
+            where (dict): Dimension mapped to the value (or list of values) to keep.
+
+        Returns:
+            Pandas Series of sums.
+        '''
+        return self._aggregate(self._sums[measure], by, where, measure)
+
+    def means(self, measure, by=None, where=None):
+        '''
+        This method returns the mean of a measure in each group, like df.groupby(by)[measure].mean().
+
+        Parameters:
+            measure (str): Measure column header.
+            by (str or list of str): Dimension(s) to group by.
+            where (dict): Dimension mapped to the value (or list of values) to keep.
+
+        Returns:
+            Pandas Series of means.
+        '''
+        present = self._aggregate(self._sums[f'{measure}__present'], by, where, measure)
+        return self.sums(measure, by, where) / present
+
+    def value_counts(self, column, by=None, normalize=False, where=None):
+        '''
+        This method returns the value counts of a dimension within each group, like df.groupby(by)[column].value_counts(normalize).
+
+        Parameters:
+            column (str): Dimension to count the values of.
+            by (str or list of str): Dimension(s) to group by. The value counts of the whole (filtered) df are returned if None.
+            normalize (bool): Whether to return proportions within each group instead of counts.
+            where (dict): Dimension mapped to the value (or list of values) to keep.
+
+        Returns:
+            Pandas Series of counts (or proportions), highest first within each group.
+        '''
+        by = [by] if isinstance(by, str) else list(by or [])
+        counts = self.counts(by + [column], where)
+        if normalize:
+            totals = counts.groupby(level=by).transform('sum') if by else counts.sum()
+            counts = (counts / totals).rename('proportion')
+        # Groups in code order (category order for categorical dimensions, as in groupby), values highest first within each group.
+        group_codes = [self.labels[dimension].get_indexer(counts.index.get_level_values(dimension)) for dimension in by]
+        order = np.lexsort([-counts.to_numpy()] + group_codes[::-1])
+        return counts.iloc[order]
@@ -1,8 +1,18 @@
+import asyncio
+import contextlib
+import os
+import re
+import time
+import types
 import yaml
 from sqlalchemy import create_engine
 from sqlalchemy.engine.url import URL
 import pandas as pd
 import psycopg2
+from lazy_import import LazyImport
+
+# asyncpg is only needed for the async extraction, so it is imported on first use:
+asyncpg = LazyImport('asyncpg')
 
 # Function to load credentials.yaml file and return data as a dictionary:
 def load_credentials(file_path):
@@ -25,6 +35,13 @@ class RDSDatabaseConnector:
     '''
     This class is used to connect to a remote AWS database and retrieve tabular data.
     
+    ------------------
+    Parameters:
+    table_name: str
+        Name of table in db, also used to create the file name.
+    directory: str
+        Local directory the .csv file is saved to (including the trailing slash).
+
     ------------------
     Methods:
     save_data()
@@ -33,7 +50,13 @@ class RDSDatabaseConnector:
         Creates a df containing all data from specified table.
     connect_db()
         Connects to remote RDS.
+    read_table()
+        Connects to remote RDS and returns the data from specified table as a df, without saving it.
     '''
+    def __init__(self, table_name='customer_activity', directory=''):
+        self.table_name = table_name
+        self.directory = directory
+
     def save_data(self, df):
         '''
         This method saves the Pandas df to .csv file in specified local directory.
@@ -45,7 +68,7 @@ class RDSDatabaseConnector:
             .csv file containing data.
         '''
         try:
-            df.to_csv(f'{directory}{table_name}.csv', index=False)
+            df.to_csv(f'{self.directory}{self.table_name}.csv', index=False)
             print('Data saved')
         except:
             print('Saving failed')
@@ -60,7 +83,7 @@ class RDSDatabaseConnector:
         Returns:
             Calls save_data() function with df. 
         '''
-        df = pd.read_sql(f'SELECT * FROM {table_name}', conn)
+        df = pd.read_sql(f'SELECT * FROM {self.table_name}', conn)
         conn.close()
         return self.save_data(df)
     
@@ -82,23 +105,272 @@ class RDSDatabaseConnector:
         except:
             print('Connection failed')
         return self.load_df(conn)
+
+    def read_table(self, credentials_dict):
+        '''
+        This method connects to the remote RDS and returns the data from the selected table.
+
+        Parameters: 
+            credentials_dict (dict): Dictionary of login credentials
+
+        Returns:
+            Pandas df containing all data from the table.
+        '''
+        url = URL.create('postgresql+psycopg2', **credentials_dict)
+        engine = create_engine(url)
+        with engine.connect() as conn:
+            return pd.read_sql(f'SELECT * FROM {self.table_name}', conn)
         
-def load_db(credentials_file_path):
+def load_db(credentials_file_path, table_name='customer_activity', directory=''):
     '''
     This function creates an instance of the class RDSDatabaseConnector and calls the connect_db function to load db using login credentials.
 
     Parameters:
         credentials_file_path (str): Local file path for .yaml file containing login credentials.
+        table_name (str): Name of table in db, also used to create file_name.
+        directory (str): Local directory to save the .csv file to (including the trailing slash).
 
     Returns:
         Calls connect_db() function with credentials dictionary. 
     '''
     credentials = load_credentials(credentials_file_path)
-    connection = RDSDatabaseConnector()
+    connection = RDSDatabaseConnector(table_name, directory)
     connection.connect_db(credentials) 
 
+def _table_spec(table):
+    # A table name, or a dict with the name (used for the file name), the query and its arguments, e.g. one date partition.
+    if isinstance(table, str):
+        return {'name': table, 'query': f'SELECT * FROM {table}', 'args': []}
+    return {'name': table['name'], 'query': table.get('query', f"SELECT * FROM {table['name']}"), 'args': list(table.get('args', []))}
+
+async def create_pool(credentials_dict, max_concurrency=4):
+    '''
+    Function to create an asyncpg connection pool to the remote RDS from the same credentials used by RDSDatabaseConnector.
+
+    Parameters:
+        credentials_dict (dict): Dictionary of login credentials (host, port, database, username, password).
+        max_concurrency (int): Maximum number of connections.
+
+    Returns:
+        asyncpg connection pool.
+    '''
+    return await asyncpg.create_pool(
+        host=credentials_dict['host'], port=credentials_dict.get('port', 5432), database=credentials_dict['database'],
+        user=credentials_dict['username'], password=credentials_dict['password'], min_size=1, max_size=max_concurrency)
+
+def _decode_and_write(records, columns, file_path, first_batch):
+    # Runs in a worker thread, so the event loop keeps fetching while the batch is decoded and appended to the .csv file.
+    df = pd.DataFrame([tuple(record) for record in records], columns=columns)
+    if file_path is not None:
+        df.to_csv(file_path, mode='w' if first_batch else 'a', header=first_batch, index=False)
+    return df
+
+async def _consume(queue, columns, file_path, result, keep_df):
+    # Consumer: decodes and writes batches in arrival order. After an error the queue is still drained, so the producer never blocks.
+    batches = []
+    first_batch = True
+    while True:
+        records = await queue.get()
+        if records is None:
+            break
+        if 'error' in result:
+            continue
+        try:
+            start = time.perf_counter()
+            df = await asyncio.to_thread(_decode_and_write, records, columns, file_path, first_batch)
+            result['write_time'] += time.perf_counter() - start
+            result['rows'] += len(df)
+            first_batch = False
+            if keep_df:
+                batches.append(df)
+        except Exception as error:
+            result['error'] = error
+    if 'error' not in result:
+        if first_batch:
+            # No rows, but the .csv file still gets its header.
+            await asyncio.to_thread(_decode_and_write, [], columns, file_path, True)
+        if keep_df:
+            result['df'] = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame(columns=columns)
+
+async def _extract_table(pool, table, directory, semaphore, batch_size, queue_size, keep_df, write_csv):
+    spec = _table_spec(table)
+    file_path = f"{directory}{spec['name']}.csv" if write_csv else None
+    result = {'name': spec['name'], 'path': file_path, 'rows': 0, 'wait_time': 0.0, 'fetch_time': 0.0, 'write_time': 0.0, 'elapsed': 0.0}
+    start = time.perf_counter()
+    async with semaphore:
+        result['wait_time'] = time.perf_counter() - start
+        queue = asyncio.Queue(maxsize=queue_size)
+        consumer = None
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    statement = await conn.prepare(spec['query'])
+                    columns = [attribute.name for attribute in statement.get_attributes()]
+                    consumer = asyncio.create_task(_consume(queue, columns, file_path, result, keep_df))
+                    cursor = await statement.cursor(*spec['args'])
+                    # Producer: the next batch is fetched while the consumer decodes and writes the previous ones.
+                    while 'error' not in result:
+                        fetch_start = time.perf_counter()
+                        records = await cursor.fetch(batch_size)
+                        result['fetch_time'] += time.perf_counter() - fetch_start
+                        if not records:
+                            break
+                        await queue.put(records)
+        except Exception as error:
+            result['error'] = error
+        finally:
+            if consumer is not None:
+                await queue.put(None)
+                await consumer
+    result['elapsed'] = time.perf_counter() - start
+    if 'error' in result:
+        # A table that failed partway must not leave a partial .csv file behind.
+        if file_path is not None and os.path.exists(file_path):
+            os.remove(file_path)
+        result['path'] = None
+        print(f"Extracting {spec['name']} failed: {result['error']}")
+    return result
+
+async def extract_tables_async(credentials_dict, tables, directory='', max_concurrency=4, batch_size=50000, queue_size=4, keep_dfs=False, write_csv=True, pool=None):
+    '''
+    Function to extract many tables or queries (e.g. date partitions) from the remote RDS concurrently with asyncio.
+    At most max_concurrency queries run at once. Each query is read in batches through a server-side cursor; a producer fetches batches into a bounded queue while a consumer decodes them and appends them to the .csv file, so network fetch overlaps with decoding and writing.
+    The total time approaches that of the slowest table rather than the sum of all tables.
+
+    Parameters:
+        credentials_dict (dict): Dictionary of login credentials (not used if pool is given).
+        tables (list): Table names, or dicts with 'name' (used for the file name), 'query' and 'args', e.g. {'name': 'customer_activity_may', 'query': 'SELECT * FROM customer_activity WHERE month = $1', 'args': ['May']}.
+        directory (str): Local directory to save the .csv files to (including the trailing slash).
+        max_concurrency (int): Maximum number of queries run at once.
+        batch_size (int): Number of rows fetched at a time.
+        queue_size (int): Maximum number of fetched batches waiting to be written, for each table.
+        keep_dfs (bool): Whether to also return the data of each table as a df.
+        write_csv (bool): Whether to save each table as a .csv file.
+        pool: asyncpg pool (or LocalDatabasePool) to use instead of creating one from the credentials.
+
+    Returns:
+        List of dictionaries, one per table in the order given (name, path, rows, wait_time, fetch_time, write_time, elapsed, and df or error if any).
+        The path of a failed table is None and no .csv file is left for it.
+    '''
+    own_pool = pool is None
+    if own_pool:
+        pool = await create_pool(credentials_dict, max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            _extract_table(pool, table, directory, semaphore, batch_size, queue_size, keep_dfs, write_csv) for table in tables])
+    finally:
+        if own_pool:
+            await pool.close()
+    total = time.perf_counter() - start
+    busy = sum(result['elapsed'] - result['wait_time'] for result in results)
+    print(f'Extracted {len(results)} tables in {total:.2f} s (sum of table times {busy:.2f} s)')
+    return results
+
+def load_tables(credentials_file_path, tables, directory='', max_concurrency=4, batch_size=50000):
+    '''
+    Function to load many tables or queries from the remote RDS concurrently and save each as a .csv file, using login credentials.
+
+    Parameters:
+        credentials_file_path (str): Local file path for .yaml file containing login credentials.
+        tables (list): Table names, or dicts with 'name', 'query' and 'args' (see extract_tables_async()).
+        directory (str): Local directory to save the .csv files to (including the trailing slash).
+        max_concurrency (int): Maximum number of queries run at once.
+        batch_size (int): Number of rows fetched at a time.
+
+    Returns:
+        List of dictionaries with the result and timings of each table.
+    '''
+    credentials = load_credentials(credentials_file_path)
+    return asyncio.run(extract_tables_async(credentials, tables, directory, max_concurrency, batch_size))
+
+class _LocalCursor():
+    def __init__(self, rows, latency):
+        self._rows = rows
+        self._position = 0
+        self._latency = latency
+
+    async def fetch(self, n):
+        await asyncio.sleep(self._latency)
+        records = self._rows[self._position:self._position + n]
+        self._position += n
+        return records
+
+class _LocalStatement():
+    def __init__(self, df, column, latency):
+        self._df = df
+        self._column = column
+        self._latency = latency
+
+    def get_attributes(self):
+        return [types.SimpleNamespace(name=name) for name in self._df.columns]
+
+    async def cursor(self, *args):
+        df = self._df if self._column is None else self._df[self._df[self._column] == args[0]]
+        return _LocalCursor(list(df.itertuples(index=False, name=None)), self._latency)
+
+class _LocalConnection():
+    def __init__(self, pool):
+        self._pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def transaction(self):
+        return contextlib.nullcontext()
+
+    async def prepare(self, query):
+        match = re.fullmatch(r'\s*SELECT \* FROM (\w+)(?: WHERE (\w+) = \$1)?\s*;?\s*', query, re.IGNORECASE)
+        if match is None:
+            raise ValueError(f'LocalDatabasePool only supports "SELECT * FROM table [WHERE column = $1]" queries: {query}')
+        if match.group(1) not in self._pool.tables:
+            raise ValueError(f'Table {match.group(1)} does not exist.')
+        await asyncio.sleep(self._pool.latency)
+        return _LocalStatement(self._pool.tables[match.group(1)], match.group(2), self._pool.latency)
+
+class LocalDatabasePool():
+    '''
+    This class is a local stand-in for an asyncpg connection pool, serving Pandas dfs as tables, so the async extraction can be run and tested without database credentials.
+    Only the calls used by extract_tables_async() are provided, for "SELECT * FROM table" queries optionally filtered with "WHERE column = $1".
+
+    ------------------
+    Parameters:
+    tables: dict
+        Table name mapped to a Pandas df, e.g. from synthetic_data.generate_customer_activity().
+    latency: float
+        Seconds added to each query and each fetched batch, to simulate the network round trip.
+
+    ------------------
+    Methods:
+    acquire()
+        Returns a connection, used with async with.
+    close()
+        Closes the pool (no-op).
+    '''
+    def __init__(self, tables, latency=0.0):
+        self.tables = tables
+        self.latency = latency
+
+    def acquire(self):
+        return _LocalConnection(self)
+
+    async def close(self):
+        pass
+
 if __name__ == '__main__':
-    credentials_file_path = 'C:/Users/Chris/Documents/AiCoreEDA_Project/credentials.yaml' # Use of forward slash instead of backslash
-    table_name = 'customer_activity'    # Name of table in db, also used to create file_name.
-    directory = 'C:/Users/Chris/Documents/AiCoreEDA_Project/'  # To save df C:\Users\Chris\Documents\AiCoreEDA_Project\customer_activity_transformed.csv
-    load_db(credentials_file_path)
+    import argparse
+    parser = argparse.ArgumentParser(description='Download a table from the remote RDS to a local .csv file.')
+    parser.add_argument('credentials_file_path', help='.yaml file containing login credentials')
+    parser.add_argument('--table-name', default='customer_activity', help='name of table in db, also used to create file name')
+    parser.add_argument('--directory', default='', help='directory to save the .csv file to (including the trailing slash)')
+    parser.add_argument('--tables', nargs='+', help='load several tables concurrently instead of --table-name')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='maximum number of tables loaded at once with --tables')
+    args = parser.parse_args()
+    if args.tables:
+        load_tables(args.credentials_file_path, args.tables, args.directory, args.max_concurrency)
+    else:
+        load_db(args.credentials_file_path, args.table_name, args.directory)
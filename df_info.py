@@ -1,3 +1,7 @@
+from instrumentation import instrument_class
+from missingness import MissingnessEngine
+
+@instrument_class
 class DataFrameInfo():
     '''
     This class is used to generate basic information about a dataframe.
@@ -97,12 +101,12 @@ class DataFrameInfo():
         Returns:
             The number of null values for each column as a percentage of all values.
         '''
-        all_values = len(self.df_name)
+        # Rebuilt on every call, so the result reflects any imputation since the last call.
+        percentages = MissingnessEngine(self.df_name).null_percentage()
         print(f'For any columns containing null values the percentage of null values for that column is:')
         print()
-        for column in list(self.df_name):
-            sum_missing_values = self.df_name[column].isna().sum()
-            percentage = round((100 * sum_missing_values / all_values), 2)
+        for column, percentage in percentages.items():
+            percentage = round(percentage, 2)
             if percentage > 0:
                 print(f'{column} is: {percentage} %')
             else:
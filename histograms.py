@@ -0,0 +1,176 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+class Histogram():
+    '''
+    This class is used to bin a numeric variable once, so histograms, density plots and CDF plots can all be drawn from the same bins.
+    Histograms with the same bin edges (e.g. from different chunks of a dataset) can be merged.
+
+    ------------------
+    Parameters:
+    edges: np.ndarray
+        Bin edges (number of bins + 1 values), in increasing order and evenly spaced.
+
+    ------------------
+    Attributes:
+    edges: np.ndarray
+        Bin edges.
+    counts: np.ndarray
+        Number of values in each bin. The last bin includes its right edge.
+    cumulative: np.ndarray
+        Cumulative sum of counts.
+    total: int
+        Number of values binned.
+    sum: float
+        Sum of the values binned.
+    sum_squares: float
+        Sum of the squares of the values binned.
+
+    ------------------
+    Methods:
+    update()
+        Adds values to the histogram in one vectorised pass.
+    merge()
+        Combines another histogram with the same edges into this one.
+    density()
+        Returns the probability density of each bin.
+    kde()
+        Returns a Gaussian kernel density estimate evaluated from the bins.
+    '''
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('edges must be at least two increasing values.')
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.cumulative = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.total = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+
+    def update(self, values):
+        '''
+        This method adds values to the histogram. Nulls and values outside the edges are ignored.
+
+        Parameters:
+            values (Pandas Series/array): Values to bin.
+
+        Returns:
+            The histogram, to allow chaining.
+        '''
+        values = np.asarray(values, dtype=np.float64)
+        values = values[(values >= self.edges[0]) & (values <= self.edges[-1])]
+        n_bins = len(self.counts)
+        # Bin index from the even bin width, with the right edge falling in the last bin as in np.histogram.
+        index = ((values - self.edges[0]) * (n_bins / (self.edges[-1] - self.edges[0]))).astype(np.int64)
+        np.minimum(index, n_bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=n_bins)
+        self.cumulative = np.cumsum(self.counts)
+        self.total += len(values)
+        self.sum += float(values.sum())
+        self.sum_squares += float(np.dot(values, values))
+        return self
+
+    def merge(self, other):
+        '''
+        This method combines another histogram with the same edges (e.g. from another chunk) into this one.
+
+        Parameters:
+            other (Histogram): Histogram with identical edges.
+
+        Returns:
+            The histogram, to allow chaining.
+        '''
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('Only histograms with the same edges can be merged.')
+        self.counts = self.counts + other.counts
+        self.cumulative = np.cumsum(self.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        return self
+
+    def density(self):
+        '''
+        This method returns the probability density of each bin, so the area of all bins sums to 1.
+
+        Returns:
+            np.ndarray of densities.
+        '''
+        return self.counts / (max(self.total, 1) * np.diff(self.edges))
+
+    def kde(self, n_points=200):
+        '''
+        This method returns a Gaussian kernel density estimate evaluated from the bins, using Scott's rule for the bandwidth (as seaborn does).
+
+        Parameters:
+            n_points (int): Number of points to evaluate the estimate at.
+
+        Returns:
+            x (np.ndarray): Evaluation points.
+            y (np.ndarray): Probability density at each point.
+        '''
+        centres = (self.edges[:-1] + self.edges[1:]) / 2
+        x = np.linspace(self.edges[0], self.edges[-1], n_points)
+        if self.total < 2:
+            return x, np.zeros(n_points)
+        mean = self.sum / self.total
+        std = np.sqrt(max(self.sum_squares / self.total - mean ** 2, 0) * self.total / (self.total - 1))
+        bandwidth = std * self.total ** (-1 / 5)
+        if bandwidth == 0:
+            bandwidth = np.diff(self.edges).mean()
+        kernel = np.exp(-0.5 * ((x[:, None] - centres[None, :]) / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+        return x, kernel @ self.counts / self.total
+
+def histogram_edges(minimum, maximum, bins=25):
+    '''
+    Function to create evenly spaced bin edges, e.g. to share between the chunks of a dataset.
+
+    Parameters:
+        minimum (float): Left edge of the first bin.
+        maximum (float): Right edge of the last bin.
+        bins (int): Number of bins.
+
+    Returns:
+        np.ndarray of bin edges.
+    '''
+    if not maximum > minimum:
+        # As np.histogram does, widen an empty range so there is a valid set of bins.
+        minimum, maximum = minimum - 0.5, maximum + 0.5
+    return np.linspace(minimum, maximum, bins + 1)
+
+def histogram(values, bins=25, edges=None):
+    '''
+    Function to bin a numeric variable. Bin edges are taken from the data's range if not given.
+
+    Parameters:
+        values (Pandas Series/array): Values to bin.
+        bins (int): Number of bins (ignored if edges is given).
+        edges (np.ndarray): Bin edges.
+
+    Returns:
+        Histogram of the values.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if edges is None:
+        edges = histogram_edges(values.min(), values.max(), bins) if len(values) else histogram_edges(0.0, 1.0, bins)
+    return Histogram(edges).update(values)
+
+def histogram_chunks(chunks, column_name, edges):
+    '''
+    Function to bin a numeric variable over a sequence of df chunks with fixed bin edges.
+
+    Parameters:
+        chunks (iterable of Pandas df): The data, one chunk at a time.
+        column_name (str): Column header.
+        edges (np.ndarray): Bin edges, e.g. from histogram_edges().
+
+    Returns:
+        Histogram of the column across all chunks.
+    '''
+    result = Histogram(edges)
+    for chunk in chunks:
+        result.update(chunk[column_name].to_numpy(dtype=np.float64, na_value=np.nan))
+    return result
@@ -0,0 +1,280 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Instrumentation is off unless enabled here or with the EDA_INSTRUMENT environment variable.
+# While off (and no hooks are attached) each instrumented call only costs one extra function call and a flag check.
+_enabled = False
+_track_memory = False
+# Whether enable() started tracemalloc, so disable() never stops a trace started by the caller.
+_started_tracing = False
+_active = False
+_hooks = {}
+_hook_results = {}
+_records = collections.deque(maxlen=100000)
+_start_time = time.perf_counter()
+_local = threading.local()
+
+def _update_active():
+    global _active
+    _active = _enabled or bool(_hooks)
+
+def enable(track_memory=False, max_records=100000):
+    '''
+    Function to start recording the wall time, CPU time and rows processed of every call to an instrumented method.
+
+    Parameters:
+        track_memory (bool): Whether to also record bytes allocated and peak memory with tracemalloc (slows calls down noticeably).
+        max_records (int): Maximum number of calls kept; the oldest calls are discarded first.
+    '''
+    global _enabled, _track_memory, _records, _started_tracing
+    _enabled = True
+    _track_memory = track_memory
+    if max_records != _records.maxlen:
+        _records = collections.deque(_records, maxlen=max_records)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    _update_active()
+
+def disable():
+    '''
+    Function to stop recording calls. Records already made are kept until reset() is called.
+    tracemalloc is only stopped if enable() started it.
+    '''
+    global _enabled, _track_memory, _started_tracing
+    if _started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _started_tracing = False
+    _enabled = False
+    _track_memory = False
+    _update_active()
+
+def reset():
+    '''
+    Function to discard all recorded calls.
+    '''
+    global _start_time
+    _records.clear()
+    _start_time = time.perf_counter()
+
+def records():
+    '''
+    Function to return the recorded calls.
+
+    Returns:
+        List of dictionaries, one per call (name, start, wall_time, cpu_time, rows, bytes_allocated, peak_memory, thread).
+    '''
+    return list(_records)
+
+def _rows(instance):
+    df_name = getattr(instance, 'df_name', None)
+    try:
+        return len(df_name) if df_name is not None else None
+    except TypeError:
+        return None
+
+def _call_with_hook(name, function, args, kwargs):
+    # Runs a call under the profiler attached to this method name.
+    hook = _hooks[name]
+    if hook['profiler'] == 'cprofile':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function, *args, **kwargs)
+        finally:
+            stats = pstats.Stats(profiler)
+            _hook_results.setdefault(name, []).append(stats)
+            if hook['output_path']:
+                stats.dump_stats(hook['output_path'])
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        after = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        differences = after.compare_to(before, 'lineno')
+        _hook_results.setdefault(name, []).append(differences)
+        if hook['output_path']:
+            with open(hook['output_path'], 'w') as file:
+                file.writelines(f'{difference}\n' for difference in differences[:hook['limit']])
+
+def _record_call(name, function, instance, args, kwargs):
+    memory = _track_memory and tracemalloc.is_tracing()
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = {'peak': 0}
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        # Keep the peak reached so far by the enclosing call before resetting it for this call.
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        frame['start_memory'] = current
+    stack.append(frame)
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        if name in _hooks:
+            return _call_with_hook(name, function, args, kwargs)
+        return function(*args, **kwargs)
+    finally:
+        wall_time = time.perf_counter() - start
+        cpu_time = time.process_time() - start_cpu
+        stack.pop()
+        if _enabled:
+            record = {
+                'name': name,
+                'start': start - _start_time,
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'rows': _rows(instance),
+                'bytes_allocated': None,
+                'peak_memory': None,
+                'thread': threading.get_ident(),
+            }
+            if memory and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame['peak'])
+                record['bytes_allocated'] = current - frame['start_memory']
+                record['peak_memory'] = peak - frame['start_memory']
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            _records.append(record)
+
+def instrument_class(cls):
+    '''
+    Class decorator to instrument every public method of a class.
+    Calls are recorded as 'ClassName.method_name'.
+
+    Parameters:
+        cls (class): Class to instrument.
+
+    Returns:
+        The class, with its public methods wrapped.
+    '''
+    for attribute, function in list(vars(cls).items()):
+        if attribute.startswith('_') or not callable(function):
+            continue
+        setattr(cls, attribute, _instrument(f'{cls.__name__}.{attribute}', function))
+    return cls
+
+def _instrument(name, function):
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if not _active:
+            return function(self, *args, **kwargs)
+        return _record_call(name, function, self, (self,) + args, kwargs)
+    wrapper.instrumented_name = name
+    return wrapper
+
+def attach_profiler(name, profiler='cprofile', output_path=None, limit=25):
+    '''
+    Function to profile every call to one named method with cProfile or tracemalloc, whether or not instrumentation is enabled.
+
+    Parameters:
+        name (str): Method name, e.g. 'Plotter.correlation_matrix'.
+        profiler (str): 'cprofile' or 'tracemalloc'.
+        output_path (str): File to write the profile of the latest call to (.prof for cProfile, text for tracemalloc).
+        limit (int): Number of lines written for tracemalloc profiles.
+    '''
+    if profiler not in ('cprofile', 'tracemalloc'):
+        raise ValueError("profiler must be 'cprofile' or 'tracemalloc'")
+    _hooks[name] = {'profiler': profiler, 'output_path': output_path, 'limit': limit}
+    _update_active()
+
+def detach_profiler(name):
+    '''
+    Function to stop profiling a method attached with attach_profiler().
+
+    Parameters:
+        name (str): Method name, e.g. 'Plotter.correlation_matrix'.
+    '''
+    _hooks.pop(name, None)
+    _update_active()
+
+def profiler_results(name):
+    '''
+    Function to return the profiles collected for a method, one per call.
+
+    Parameters:
+        name (str): Method name, e.g. 'Plotter.correlation_matrix'.
+
+    Returns:
+        List of pstats.Stats (cProfile) or lists of tracemalloc.StatisticDiff (tracemalloc).
+    '''
+    return list(_hook_results.get(name, []))
+
+def summary(top=10, by='wall_time'):
+    '''
+    Function to print and return the slowest recorded calls and the total time spent in each method.
+
+    Parameters:
+        top (int): Number of calls and methods to show.
+        by (str): Metric to rank by ('wall_time', 'cpu_time', 'peak_memory' or 'bytes_allocated').
+
+    Returns:
+        slowest (list of dict): The top recorded calls.
+        totals (list of dict): Calls, total and mean of the metric for the top methods.
+    '''
+    calls = [record for record in _records if record.get(by) is not None]
+    slowest = sorted(calls, key=lambda record: record[by], reverse=True)[:top]
+    grouped = {}
+    for record in calls:
+        total = grouped.setdefault(record['name'], {'name': record['name'], 'calls': 0, 'total': 0.0, 'rows': 0})
+        total['calls'] += 1
+        total['total'] += record[by]
+        total['rows'] += record['rows'] or 0
+    totals = sorted(grouped.values(), key=lambda total: total['total'], reverse=True)[:top]
+    for total in totals:
+        total['mean'] = total['total'] / total['calls']
+    print(f'Slowest {len(slowest)} calls by {by}:')
+    for record in slowest:
+        print(f"    {record['name']}: {record[by]:.6g} ({record['rows']} rows)")
+    print(f'Methods with the highest total {by}:')
+    for total in totals:
+        print(f"    {total['name']}: {total['total']:.6g} over {total['calls']} calls (mean {total['mean']:.6g})")
+    return slowest, totals
+
+def export_json(file_path):
+    '''
+    Function to save the recorded calls to a .json file.
+
+    Parameters:
+        file_path (str): Path of the .json file.
+    '''
+    with open(file_path, 'w') as file:
+        json.dump(records(), file, indent=2)
+
+def export_chrome_trace(file_path):
+    '''
+    Function to save the recorded calls in the Chrome trace event format, to view as a timeline in chrome://tracing or Perfetto.
+
+    Parameters:
+        file_path (str): Path of the .json file.
+    '''
+    events = [{
+        'name': record['name'],
+        'cat': record['name'].split('.')[0],
+        'ph': 'X',
+        'ts': record['start'] * 1e6,
+        'dur': record['wall_time'] * 1e6,
+        'pid': os.getpid(),
+        'tid': record['thread'],
+        'args': {key: record[key] for key in ('cpu_time', 'rows', 'bytes_allocated', 'peak_memory')},
+    } for record in _records]
+    with open(file_path, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+if os.environ.get('EDA_INSTRUMENT'):
+    enable(track_memory=os.environ.get('EDA_INSTRUMENT') == 'memory')
@@ -0,0 +1,58 @@
+import importlib
+
+class LazyImport():
+    '''
+    This class is used to defer the import of a heavy dependency until it is first used.
+    The module (or an attribute of the module, e.g. a function) is imported on first attribute access or call and cached afterwards.
+
+    ------------------
+    Parameters:
+    module_name: str
+        Dotted name of the module to import, e.g. 'matplotlib.pyplot'.
+    attribute: str (optional)
+        Name of an object within the module to return instead of the module itself, e.g. 'qqplot'.
+
+    ------------------
+    Attributes:
+    module_name: str
+        Dotted name of the module to import.
+    attribute: str
+        Name of an object within the module (or None).
+
+    ------------------
+    Methods:
+    load()
+        Imports the module (and attribute) if not already imported and returns it.
+    '''
+    def __init__(self, module_name, attribute=None):
+        self.module_name = module_name
+        self.attribute = attribute
+        self._loaded = None
+
+    def load(self):
+        '''
+        This method imports the module (and attribute) if not already imported and returns it.
+
+        Returns:
+            The imported module, or the specified attribute of the imported module.
+        '''
+        if self._loaded is None:
+            loaded = importlib.import_module(self.module_name)
+            if self.attribute is not None:
+                loaded = getattr(loaded, self.attribute)
+            self._loaded = loaded
+        return self._loaded
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the proxy itself, i.e. attributes of the wrapped module.
+        if name.startswith('__') or name in ('module_name', 'attribute', '_loaded'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        target = self.module_name if self.attribute is None else f'{self.module_name}.{self.attribute}'
+        state = 'loaded' if self._loaded is not None else 'not loaded'
+        return f'<LazyImport {target} ({state})>'
@@ -0,0 +1,289 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+# Number of set bits in every possible byte, used to count nulls straight from the packed bitmap.
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+# Number of packed bytes (8 rows each) processed at a time when combining or unpacking the bitmap.
+_CHUNK_BYTES = 1 << 16
+
+def _popcount(packed):
+    '''
+    Function to count the set bits in each byte of a packed uint8 array.
+
+    Parameters:
+        packed (np.ndarray): Array of uint8.
+
+    Returns:
+        Array of the same shape holding the number of set bits in each byte.
+    '''
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(packed)
+    return _POPCOUNT_TABLE[packed]
+
+class MissingnessEngine():
+    '''
+    This class is used to analyse the missing values of a dataframe from a packed null bitmap.
+    The bitmap (one bit per row for each column) is computed once, then counts, nullity correlation, row patterns and the downsampled matrix view are all derived from it.
+
+    ------------------
+    Parameters:
+    df_name: Pandas df
+        A Pandas dataframe
+
+    ------------------
+    Attributes:
+    columns: list
+        Column headers of the df.
+    n_rows: int
+        Number of rows in the df.
+    packed: np.ndarray
+        uint8 array of shape (number of columns, ceil(n_rows / 8)), bit set where the value is null.
+    null_counts: np.ndarray
+        Number of null values in each column.
+
+    ------------------
+    Methods:
+    null_count()
+        Returns the number of null values in each column.
+    null_percentage()
+        Returns the number of null values in each column as a percentage of all values.
+    nullity_correlation()
+        Returns the correlation of missingness between every two columns containing some (but not only) null values.
+    row_patterns()
+        Returns the frequency of each combination of null values across rows.
+    matrix_summary()
+        Returns the fraction of null values in each column for evenly sized blocks of rows.
+    '''
+    def __init__(self, df_name):
+        self.columns = list(df_name.columns)
+        self.n_rows = len(df_name)
+        n_bytes = (self.n_rows + 7) // 8
+        self.packed = np.zeros((len(self.columns), n_bytes), dtype=np.uint8)
+        # Built one column at a time so only a single boolean column is held in memory alongside the bitmap.
+        for position, column in enumerate(self.columns):
+            self.packed[position] = np.packbits(df_name.iloc[:, position].isna().to_numpy())
+        self.null_counts = _popcount(self.packed).sum(axis=1, dtype=np.int64)
+
+    def null_count(self):
+        '''
+        This method returns the number of null values in each column.
+
+        Returns:
+            Pandas Series of null value counts indexed by column header.
+        '''
+        return pd.Series(self.null_counts, index=self.columns, name='null_count')
+
+    def null_percentage(self):
+        '''
+        This method returns the number of null values in each column as a percentage of all values.
+
+        Returns:
+            Pandas Series of null value percentages indexed by column header.
+        '''
+        if self.n_rows == 0:
+            return pd.Series(0.0, index=self.columns, name='null_percentage')
+        return pd.Series(100 * self.null_counts / self.n_rows, index=self.columns, name='null_percentage')
+
+    def _partially_null_positions(self):
+        # Columns that are fully complete or fully null carry no information about co-occurrence.
+        return np.flatnonzero((self.null_counts > 0) & (self.null_counts < self.n_rows))
+
+    def nullity_correlation(self):
+        '''
+        This method returns the correlation of missingness between every two columns containing some (but not only) null values.
+        - A value near -1 means if one variable appears then the other variable is very likely to be missing.
+        - A value near 0 means there is no dependence between the occurrence of missing values of two variables.
+        - A value near 1 means if one variable appears then the other variable is very likely to be present.
+
+        Returns:
+            Pandas df holding the nullity correlation matrix.
+        '''
+        positions = self._partially_null_positions()
+        names = [self.columns[position] for position in positions]
+        packed = self.packed[positions]
+        counts = self.null_counts[positions].astype(np.float64)
+        # Number of rows where both columns are null, accumulated in chunks to bound memory.
+        both_null = np.zeros((len(positions), len(positions)), dtype=np.float64)
+        for start in range(0, packed.shape[1], _CHUNK_BYTES):
+            chunk = packed[:, start:start + _CHUNK_BYTES]
+            both_null += _popcount(chunk[:, None, :] & chunk[None, :, :]).sum(axis=2, dtype=np.int64)
+        # Pearson correlation of two binary vectors from their counts and co-occurrence counts.
+        n = float(self.n_rows)
+        covariance = n * both_null - np.outer(counts, counts)
+        spread = np.sqrt(counts * (n - counts))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.outer(spread, spread)
+        return pd.DataFrame(correlation, index=names, columns=names)
+
+    def row_patterns(self):
+        '''
+        This method returns the frequency of each combination of null values across rows, considering only columns that contain null values.
+
+        Returns:
+            Pandas df with one boolean column per column containing null values (True where null) and a 'count' column, sorted by count.
+        '''
+        positions = np.flatnonzero(self.null_counts > 0)
+        names = [self.columns[position] for position in positions]
+        if len(positions) == 0:
+            return pd.DataFrame({'count': [self.n_rows]}) if self.n_rows else pd.DataFrame({'count': []})
+        if len(positions) > 62:
+            raise ValueError('Row patterns can only be computed for up to 62 columns containing null values.')
+        weights = np.left_shift(np.int64(1), np.arange(len(positions), dtype=np.int64))
+        packed = self.packed[positions]
+        use_bincount = len(positions) <= 20
+        totals = np.zeros(1 << len(positions), dtype=np.int64) if use_bincount else {}
+        for start in range(0, packed.shape[1], _CHUNK_BYTES):
+            n_chunk_rows = min(8 * _CHUNK_BYTES, self.n_rows - 8 * start)
+            bits = np.unpackbits(packed[:, start:start + _CHUNK_BYTES], axis=1, count=n_chunk_rows)
+            codes = weights @ bits.astype(np.int64)
+            if use_bincount:
+                totals += np.bincount(codes, minlength=len(totals))
+            else:
+                chunk_codes, chunk_counts = np.unique(codes, return_counts=True)
+                for code, count in zip(chunk_codes.tolist(), chunk_counts.tolist()):
+                    totals[code] = totals.get(code, 0) + count
+        if use_bincount:
+            codes = np.flatnonzero(totals)
+            counts = totals[codes]
+        else:
+            codes = np.fromiter(totals.keys(), dtype=np.int64, count=len(totals))
+            counts = np.fromiter(totals.values(), dtype=np.int64, count=len(totals))
+        patterns = {name: (codes & weight) > 0 for name, weight in zip(names, weights)}
+        patterns['count'] = counts
+        return pd.DataFrame(patterns).sort_values('count', ascending=False, ignore_index=True)
+
+    def matrix_summary(self, max_rows=1000):
+        '''
+        This method returns the fraction of null values in each column for evenly sized blocks of rows.
+        This is used to draw the missingness matrix without plotting every row.
+
+        Parameters:
+            max_rows (int): Maximum number of row blocks in the summary.
+
+        Returns:
+            The fraction of null values as an array of shape (number of blocks, number of columns) and the number of df rows in each block.
+        '''
+        n_bytes = self.packed.shape[1]
+        # Blocks are a whole number of bytes so each block is a simple sum over the packed bitmap.
+        bytes_per_block = max(1, -(-n_bytes // max(1, max_rows)))
+        n_blocks = -(-n_bytes // bytes_per_block)
+        padded = np.zeros((len(self.columns), n_blocks * bytes_per_block), dtype=np.uint8)
+        padded[:, :n_bytes] = _popcount(self.packed)
+        block_nulls = padded.reshape(len(self.columns), n_blocks, bytes_per_block).sum(axis=2, dtype=np.int64)
+        rows_per_block = np.full(n_blocks, 8 * bytes_per_block, dtype=np.int64)
+        if n_blocks:
+            rows_per_block[-1] = self.n_rows - 8 * bytes_per_block * (n_blocks - 1)
+        return (block_nulls / rows_per_block).T, rows_per_block
+
+def _category_codes(series):
+    # Integer codes for each value with -1 for nulls, reusing existing codes for category dtype.
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), len(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), len(uniques)
+
+def _chi_squared_statistic(is_null, codes, n_categories):
+    '''
+    Function to calculate the chi^2 statistic for the 2 x k contingency table of null/non-null values against category codes.
+    Matches scipy.stats.chi2_contingency, including Yates' correction when there is one degree of freedom.
+
+    Parameters:
+        is_null (np.ndarray): uint8 array, 1 where the value of the tested column is null.
+        codes (np.ndarray): Category code of each row (-1 where the categorical column is null).
+        n_categories (int): Number of distinct category codes.
+
+    Returns:
+        chi2 (float): The chi^2 statistic (0 if the table has a single row or column, as in scipy; nan if it is empty).
+        dof (int): Degrees of freedom.
+    '''
+    # Rows where the categorical column is null fall in bin 0 and are dropped, as in pd.crosstab.
+    shifted = codes + 1
+    totals = np.bincount(shifted, minlength=n_categories + 1)[1:]
+    nulls = np.bincount(shifted, weights=is_null, minlength=n_categories + 1)[1:]
+    observed = np.vstack([totals - nulls, nulls])[:, totals > 0]
+    # pd.crosstab has no row for null (or non-null) values if there are none.
+    observed = observed[observed.sum(axis=1) > 0]
+    if observed.size == 0:
+        return np.nan, 0
+    dof = (observed.shape[0] - 1) * (observed.shape[1] - 1)
+    if dof == 0:
+        return 0.0, 0
+    row_totals = observed.sum(axis=1)
+    expected = np.outer(row_totals, observed.sum(axis=0)) / row_totals.sum()
+    if dof == 1:
+        difference = expected - observed
+        observed = observed + np.sign(difference) * np.minimum(0.5, np.abs(difference))
+    return float(((observed - expected) ** 2 / expected).sum()), dof
+
+def chi_squared_pair(df_name, column_name, categorical_column):
+    '''
+    Function to calculate the chi^2 test for a trend in the frequency of NaNs in one column, as a function of one categorical column.
+    Equivalent to stats.chi2_contingency(pd.crosstab(df[column_name].isna(), df[categorical_column])), without building the table.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        column_name (str): Column to test for missingness.
+        categorical_column (str): Column to test against.
+
+    Returns:
+        chi2 (float), p_value (float) and dof (int). A column without NaNs, or tested against itself, gives chi2 = 0 and p_value = 1.
+    '''
+    stats = LazyImport('scipy.stats').load()
+    if column_name == categorical_column:
+        # The rows where the column is null are dropped as null categories, so only the non-null row is left.
+        return 0.0, 1.0, 0
+    is_null = df_name[column_name].isna().to_numpy().astype(np.uint8)
+    chi2, dof = _chi_squared_statistic(is_null, *_category_codes(df_name[categorical_column]))
+    return chi2, float(stats.chi2.sf(chi2, max(dof, 1))), dof
+
+def chi_squared_missingness(df_name, columns=None, categorical_columns=None, max_workers=None, engine=None):
+    '''
+    Function to calculate the chi^2 test for a trend in the frequency of NaNs in each column, as a function of each categorical column.
+    Every (column with nulls, categorical column) pair is tested in parallel, except a column against itself. The df is not modified.
+    A p-value greater than 0.05 suggests that the NaNs are randomly distributed with respect to the categorical column.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        columns (list of str): Columns to test for missingness. Defaults to all columns containing null values.
+        categorical_columns (list of str): Columns to test against. Defaults to all category, object and bool columns.
+        max_workers (int): Maximum number of threads used to test the pairs.
+        engine (MissingnessEngine): Engine already built for the df, to reuse its null bitmap (built here if None).
+
+    Returns:
+        Pandas df with one row per pair: column, categorical_column, chi2, p_value and dof, sorted by p_value.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    stats = LazyImport('scipy.stats').load()
+
+    if engine is None:
+        engine = MissingnessEngine(df_name)
+    positions = {column: position for position, column in enumerate(engine.columns)}
+    if columns is None:
+        columns = [column for column, count in zip(engine.columns, engine.null_counts) if count > 0]
+    if categorical_columns is None:
+        categorical_columns = list(df_name.select_dtypes(include=['category', 'object', 'bool']).columns)
+
+    codes = {column: _category_codes(df_name[column]) for column in categorical_columns}
+    null_masks = {column: np.unpackbits(engine.packed[positions[column]], count=engine.n_rows) for column in columns}
+    pairs = [(column, categorical_column) for column in columns for categorical_column in categorical_columns if column != categorical_column]
+
+    def test_pair(pair):
+        column, categorical_column = pair
+        return _chi_squared_statistic(null_masks[column], *codes[categorical_column])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(test_pair, pairs))
+
+    chi2 = np.array([result[0] for result in results], dtype=np.float64)
+    dof = np.array([result[1] for result in results], dtype=np.int64)
+    result_table = pd.DataFrame({
+        'column': [pair[0] for pair in pairs],
+        'categorical_column': [pair[1] for pair in pairs],
+        'chi2': chi2,
+        'p_value': stats.chi2.sf(chi2, np.maximum(dof, 1)),
+        'dof': dof,
+    })
+    return result_table.sort_values('p_value', ignore_index=True)
@@ -0,0 +1,243 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+stats = LazyImport('scipy.stats')
+
+# Shapiro-Wilk p-values are only accurate up to 5000 observations, so it is run on a sample of this size.
+SHAPIRO_SAMPLE_SIZE = 5000
+
+def _log_transform(values):
+    # Same rule as DataFrameTransform.log_transformation(): log(x) for positive values, 0 otherwise (nulls kept).
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.isnan(values), np.nan, np.where(values > 0, np.log(values), 0.0))
+
+def _fitted_transform(function):
+    # Box-Cox and Yeo-Johnson fit a lambda per column, so they are applied column by column on the non-null values.
+    def transform(values):
+        transformed = np.full_like(values, np.nan)
+        for position in range(values.shape[1]):
+            present = ~np.isnan(values[:, position])
+            try:
+                transformed[present, position] = function(values[present, position])[0]
+            except ValueError:
+                # Box-Cox is undefined for columns containing values <= 0.
+                pass
+        return transformed
+    return transform
+
+# Candidate transforms, each taking and returning a 2D float array with one column per variable.
+TRANSFORMS = {
+    'log': _log_transform,
+    'box-cox': _fitted_transform(lambda values: stats.boxcox(values)),
+    'yeo-johnson': _fitted_transform(lambda values: stats.yeojohnson(values)),
+}
+
+def _moments(values):
+    '''
+    Function to calculate the count, mean and central moments of each column, ignoring nulls.
+
+    Parameters:
+        values (np.ndarray): 2D float array with one column per variable.
+
+    Returns:
+        n, mean, m2, m3, m4 (np.ndarray): One value per column.
+    '''
+    n = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.nansum(values, axis=0) / n
+        deviation = values - mean
+        squared = deviation ** 2
+        m2 = np.nansum(squared, axis=0) / n
+        m3 = np.nansum(squared * deviation, axis=0) / n
+        m4 = np.nansum(squared ** 2, axis=0) / n
+    return n, mean, m2, m3, m4
+
+def _skew_z(g1, n):
+    # Vectorised scipy.stats.skewtest statistic (requires n >= 8).
+    y = g1 * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+    beta2 = (3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3)) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+    w2 = -1 + np.sqrt(2 * (beta2 - 1))
+    delta = 1 / np.sqrt(0.5 * np.log(w2))
+    alpha = np.sqrt(2.0 / (w2 - 1))
+    y = np.where(y == 0, 1, y)
+    return delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+def _kurtosis_z(b2, n):
+    # Vectorised scipy.stats.kurtosistest statistic (requires n >= 5).
+    expected = 3.0 * (n - 1) / (n + 1)
+    variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+    x = (b2 - expected) / np.sqrt(variance)
+    sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * np.sqrt((6.0 * (n + 3) * (n + 5)) / (n * (n - 2) * (n - 3)))
+    a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + np.sqrt(1 + 4.0 / (sqrt_beta1 ** 2)))
+    term1 = 1 - 2 / (9.0 * a)
+    denominator = 1 + x * np.sqrt(2 / (a - 4.0))
+    term2 = np.sign(denominator) * np.where(denominator == 0.0, np.nan, ((1 - 2.0 / a) / np.abs(denominator)) ** (1 / 3.0))
+    return (term1 - term2) / np.sqrt(2 / (9.0 * a))
+
+def _anderson_darling(values, n, mean, m2):
+    '''
+    Function to calculate the Anderson-Darling statistic for normality of each column and its approximate p-value (D'Agostino & Stephens, 1986).
+
+    Parameters:
+        values (np.ndarray): 2D float array with one column per variable.
+        n, mean, m2 (np.ndarray): Count, mean and second central moment of each column.
+
+    Returns:
+        statistic, p_value (np.ndarray): One value per column.
+    '''
+    # Nulls sort to the end of each column, so row i holds the i-th smallest value while i < n.
+    ordered = np.sort(values, axis=0)
+    std = np.sqrt(m2 * n / np.maximum(n - 1, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (ordered - mean) / std
+    rows = np.arange(len(ordered))[:, None]
+    valid = rows < n
+    # Pair the i-th smallest value with the i-th largest value of the same column.
+    mirrored = np.take_along_axis(z, np.clip(n - 1 - rows, 0, max(len(ordered) - 1, 0)), axis=0)
+    terms = (2 * rows + 1) * (stats.norm.logcdf(z) + stats.norm.logsf(mirrored))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        statistic = -n - np.where(valid, terms, 0.0).sum(axis=0) / n
+        adjusted = statistic * (1 + 0.75 / n + 2.25 / n ** 2)
+        # The first approximation turns back up (and overflows) for large statistics, so it is only evaluated below 10, where p is already < 1e-20.
+        capped = np.minimum(adjusted, 10)
+        p_value = np.select(
+            [capped >= 0.6, capped >= 0.34, capped >= 0.2],
+            [np.exp(1.2937 - 5.709 * capped + 0.0186 * capped ** 2),
+             np.exp(0.9177 - 4.279 * capped - 1.38 * capped ** 2),
+             1 - np.exp(-8.318 + 42.796 * capped - 59.938 * capped ** 2)],
+            1 - np.exp(-13.436 + 101.14 * capped - 223.73 * capped ** 2))
+        p_value = np.where(adjusted >= 10, 0.0, p_value)
+    return statistic, np.clip(p_value, 0, 1)
+
+def _shapiro(values, sample_size, rng):
+    w = np.full(values.shape[1], np.nan)
+    p_value = np.full(values.shape[1], np.nan)
+    for position in range(values.shape[1]):
+        column = values[:, position]
+        column = column[~np.isnan(column)]
+        if len(column) > sample_size:
+            column = rng.choice(column, sample_size, replace=False)
+        if len(column) >= 3 and np.ptp(column) > 0:
+            w[position], p_value[position] = stats.shapiro(column)
+    return w, p_value
+
+def _k2(n, m2, m3, m4):
+    # Sample skewness g1, kurtosis b2 and D'Agostino's K^2 statistic of each column from its central moments.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g1 = m3 / m2 ** 1.5
+        b2 = m4 / m2 ** 2
+        z_skew = np.where(n >= 8, _skew_z(g1, n), np.nan)
+        z_kurtosis = np.where(n >= 8, _kurtosis_z(b2, n), np.nan)
+    return g1, b2, z_skew ** 2 + z_kurtosis ** 2
+
+def k2_statistic(values):
+    '''
+    Function to calculate D'Agostino's K^2 statistic and p-value of each column from its skewness and kurtosis alone, without the rest of the battery.
+
+    Parameters:
+        values (np.ndarray): 2D float array with one column per variable.
+
+    Returns:
+        k2, p_value (np.ndarray): One value per column.
+    '''
+    n, mean, m2, m3, m4 = _moments(values)
+    k2 = _k2(n, m2, m3, m4)[2]
+    return k2, stats.chi2.sf(k2, 2)
+
+def _battery(values, sample_size, rng):
+    n, mean, m2, m3, m4 = _moments(values)
+    g1, b2, k2 = _k2(n, m2, m3, m4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Bias-adjusted sample skewness and excess kurtosis, matching pandas' skew() and kurt().
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * g1
+        kurtosis = ((n + 1) * (b2 - 3) + 6) * (n - 1) / ((n - 2) * (n - 3))
+    anderson, anderson_p_value = _anderson_darling(values, n, mean, m2)
+    shapiro_w, shapiro_p_value = _shapiro(values, sample_size, rng)
+    return {
+        'n': n,
+        'skew': skew,
+        'kurtosis': kurtosis,
+        'k2': k2,
+        'k2_p_value': stats.chi2.sf(k2, 2),
+        'shapiro_w': shapiro_w,
+        'shapiro_p_value': shapiro_p_value,
+        'anderson_darling': anderson,
+        'anderson_darling_p_value': anderson_p_value,
+    }
+
+def normality_tests(df_name, columns=None, transforms=False, sample_size=SHAPIRO_SAMPLE_SIZE, seed=0):
+    '''
+    Function to run a battery of normality tests on every numeric column at once: D'Agostino's K^2, Shapiro-Wilk (on a sample), Anderson-Darling, skewness and kurtosis.
+    Optionally the battery is repeated after each candidate transform (log, Box-Cox and Yeo-Johnson), so the transform to use for each column can be picked from one table.
+    For each test a p-value of less than 0.05 suggests the data are not normally distributed.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        columns (list of str): Columns to test. Defaults to all numeric columns.
+        transforms (bool or list of str): Whether to also test the transformed data, or the names of the transforms to test.
+        sample_size (int): Number of values sampled from each column for the Shapiro-Wilk test.
+        seed (int): Seed for the random number generator used for sampling.
+
+    Returns:
+        Pandas df with one row per column and transform ('none' for the original data) holding each statistic and p-value.
+    '''
+    if columns is None:
+        columns = list(df_name.select_dtypes(include='number').columns)
+    if transforms is True:
+        transforms = list(TRANSFORMS)
+    elif not transforms:
+        transforms = []
+    rng = np.random.default_rng(seed)
+    values = df_name[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    tables = []
+    for transform in ['none'] + list(transforms):
+        transformed = values if transform == 'none' else TRANSFORMS[transform](values)
+        table = pd.DataFrame(_battery(transformed, sample_size, rng))
+        table.insert(0, 'transform', transform)
+        table.insert(0, 'column', columns)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+def recommend_transforms(results, metric='skew'):
+    '''
+    Function to pick the transform that brings each column closest to a normal distribution.
+
+    Parameters:
+        results (Pandas df): Output of normality_tests() run with transforms.
+        metric (str): 'skew' to minimise the absolute skewness, or one of 'k2_p_value', 'shapiro_p_value' or 'anderson_darling_p_value' to maximise that p-value.
+
+    Returns:
+        Pandas Series of the best transform ('none' if no transform helps) for each column.
+    '''
+    score = results[metric].abs() if metric == 'skew' else -results[metric]
+    best = results.assign(score=score).dropna(subset=['score'])
+    best = best.loc[best.groupby('column', sort=False)['score'].idxmin()]
+    return best.set_index('column')['transform']
+
+def qq_quantiles(values, n_points=1000, fit=False):
+    '''
+    Function to calculate the quantiles needed for a Q-Q plot of each column against the standard normal distribution.
+    At most n_points quantiles are calculated, so the plot does not depend on the number of rows.
+
+    Parameters:
+        values (np.ndarray): 1D or 2D float array (one column per variable), nulls are ignored.
+        n_points (int): Maximum number of quantiles.
+        fit (bool): Whether to standardise the data (subtract the mean and divide by the standard deviation) first.
+
+    Returns:
+        theoretical (np.ndarray): Standard normal quantiles.
+        sample (np.ndarray): Matching quantiles of the data, one column per variable.
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = int((~np.isnan(values)).sum(axis=0).max()) if values.size else 0
+    m = max(min(n, n_points), 1)
+    probabilities = (np.arange(1, m + 1) - 0.5) / m
+    with np.errstate(invalid='ignore'):
+        sample = np.nanquantile(values, probabilities, axis=0)
+        if fit:
+            sample = (sample - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+    return stats.norm.ppf(probabilities), sample
@@ -0,0 +1,496 @@
+import argparse
+import ast
+import concurrent.futures
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import textwrap
+import threading
+import time
+import numpy as np
+import yaml
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+# Default configuration. A .yaml file passed with --config only needs the keys it changes.
+# Each stage has its own section, so changing a section only invalidates that stage (and the stages downstream of it if its output changes).
+DEFAULT_CONFIG = {
+    'cache_dir': '.pipeline_cache',
+    'output_dir': 'report/',
+    'max_workers': None,
+    'extract': {
+        'source': 'synthetic',  # 'csv', 'database' or 'synthetic'
+        'path': 'customer_activity.csv',
+        'credentials_file_path': 'credentials.yaml',
+        'table_name': 'customer_activity',
+        'n_rows': 100000,
+        'seed': 0,
+        'null_rate': 0.05,
+    },
+    'type': {
+        'category_columns': ['month', 'operating_systems', 'browser', 'region', 'traffic_type', 'visitor_type'],
+        'downcast_integers': True,
+    },
+    'clean': {
+        'drop_columns': [],
+        'drop_null_rows': ['exit_rates', 'operating_systems', 'browser'],
+        'drop_negative_rows': [],
+        'impute_mean': [],
+        'impute_median': ['administrative_duration', 'informational_duration', 'product_related_duration'],
+        'impute_mode': [],
+        'replace_categories': {
+            'operating_systems': {'categories': ['ChromeOS', 'Ubuntu', 'Other'], 'replacement': 'Other'},
+            'browser': {'categories': ['QQ', 'Sogou Explorer', 'Yandex', 'UC Browser', 'Undetermined'], 'replacement': 'Other'},
+        },
+        'transform': {},    # method ('log', 'yeo-johnson' or 'box-cox') mapped to a list of columns
+    },
+    'profile': {
+        'normality_transforms': True,
+        'sample_size': 5000,
+        'seed': 0,
+    },
+    'correlation': {
+        'methods': ['pearson', 'spearman'],
+        'pairwise': True,
+    },
+    'conversion': {
+        'dimensions': ['region', 'visitor_type', 'traffic_type', 'month', 'weekend'],
+        'outcome': 'revenue',
+        'n_resamples': 2000,
+        'seed': 0,
+    },
+    'report': {
+        'top_correlations': 10,
+        'top_segments': 3,
+    },
+}
+
+def extract_stage(inputs, config):
+    '''
+    Stage function to load the raw customer_activity data from a .csv file, the remote RDS or the synthetic data generator.
+    '''
+    if config['source'] == 'csv':
+        return pd.read_csv(config['path'])
+    if config['source'] == 'database':
+        from db_utils import load_credentials, RDSDatabaseConnector
+        credentials = load_credentials(config['credentials_file_path'])
+        return RDSDatabaseConnector(config['table_name']).read_table(credentials)
+    if config['source'] == 'synthetic':
+        from synthetic_data import generate_customer_activity
+        # The .csv and database sources return plain columns, so the synthetic data does too; the type stage sets the data types.
+        df = generate_customer_activity(config['n_rows'], seed=config['seed'], null_rate=config['null_rate'])
+        return df.astype({column: object for column in df.select_dtypes(include='category').columns})
+    raise ValueError("source must be 'csv', 'database' or 'synthetic'")
+
+def type_stage(inputs, config):
+    '''
+    Stage function to set the data types of the extracted df and compact it (category columns and downcast integers).
+    '''
+    from transformations import DataTransform
+    df = inputs['extract'].copy()
+    DataTransform(df).to_category(*[column for column in config['category_columns'] if column in df.columns])
+    if config['downcast_integers']:
+        for column in df.select_dtypes(include='integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+def clean_stage(inputs, config):
+    '''
+    Stage function to remove or impute null values, group low-count categories and transform skewed columns.
+    '''
+    from transformations import DataFrameTransform
+    # drop_columns() returns a new df, so the type stage's output is never changed in place.
+    df = DataFrameTransform(inputs['type']).drop_columns(*config['drop_columns'])
+    if config['drop_null_rows']:
+        df = DataFrameTransform(df).drop_rows_from_columns(*config['drop_null_rows'])
+    df = DataFrameTransform(df).drop_negative_rows(*config['drop_negative_rows'])
+    transform = DataFrameTransform(df)
+    for column in config['impute_mean']:
+        df[column] = transform.impute_mean(column)
+    for column in config['impute_median']:
+        df[column] = transform.impute_median(column)
+    for column in config['impute_mode']:
+        df = DataFrameTransform(df).impute_mode(column)
+    transform = DataFrameTransform(df)
+    for column, replacement in config['replace_categories'].items():
+        transform.replace_categories(column, replacement['categories'], replacement['replacement'])
+    for method, columns in config['transform'].items():
+        if method == 'log':
+            transform.log_transformation(columns)
+        else:
+            transform.yeo_or_boxcox_transformation(columns, method=method)
+    return df
+
+def profile_stage(inputs, config):
+    '''
+    Stage function to profile the cleaned df: data types, null values, descriptive statistics and normality tests.
+    '''
+    from missingness import MissingnessEngine
+    from normality import normality_tests, recommend_transforms
+    df = inputs['clean']
+    normality = normality_tests(df, transforms=config['normality_transforms'], sample_size=config['sample_size'], seed=config['seed'])
+    profile = {
+        'shape': df.shape,
+        'dtypes': df.dtypes.astype(str).rename('dtype'),
+        'null_percentage': MissingnessEngine(df).null_percentage().rename('null_percentage'),
+        'describe': df.describe(),
+        'normality': normality,
+    }
+    if config['normality_transforms']:
+        profile['recommended_transforms'] = recommend_transforms(normality).rename('recommended_transform')
+    return profile
+
+def correlation_stage(inputs, config):
+    '''
+    Stage function to calculate the correlation matrix of the numeric columns with each configured method.
+    '''
+    from correlation import correlation_matrix
+    return {method: correlation_matrix(inputs['clean'], method=method, pairwise=config['pairwise']) for method in config['methods']}
+
+def conversion_stage(inputs, config):
+    '''
+    Stage function to calculate the conversion rate of every segment of each dimension, with confidence intervals.
+    '''
+    from conversion import conversion_rates
+    df = inputs['clean']
+    dimensions = [dimension for dimension in config['dimensions'] if dimension in df.columns]
+    return conversion_rates(df, dimensions, outcome=config['outcome'], n_resamples=config['n_resamples'], seed=config['seed'])
+
+def _code_block(table):
+    return f'```\n{table.to_string()}\n```\n'
+
+def report_stage(inputs, config):
+    '''
+    Stage function to combine the profile, correlations and conversion rates into a markdown report and .csv tables.
+    '''
+    profile, correlations, conversion = inputs['profile'], inputs['correlation'], inputs['conversion']
+    sections = ['# customer_activity report\n', f"{profile['shape'][0]} rows, {profile['shape'][1]} columns.\n"]
+    sections += ['## Data types and null values\n', _code_block(pd.concat([profile['dtypes'], profile['null_percentage']], axis=1))]
+    sections += ['## Descriptive statistics\n', _code_block(profile['describe'])]
+    if 'recommended_transforms' in profile:
+        sections += ['## Recommended transforms\n', _code_block(profile['recommended_transforms'])]
+    for method, matrix in correlations.items():
+        # Each pair once, from above the diagonal.
+        pairs = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool), k=1)).stack()
+        strongest = pairs.reindex(pairs.abs().sort_values(ascending=False).index).head(config['top_correlations'])
+        sections += [f'## Strongest {method} correlations\n', _code_block(strongest.rename('correlation'))]
+    top_segments = conversion[conversion['rank'] <= config['top_segments']].set_index(['dimension', 'rank'])
+    sections += ['## Highest conversion rates\n', _code_block(top_segments[['segment', 'sessions', 'conversion_rate', 'wilson_low', 'wilson_high']])]
+    files = {'report.md': '\n'.join(sections)}
+    files['normality.csv'] = profile['normality'].to_csv(index=False)
+    files['conversion_rates.csv'] = conversion.to_csv(index=False)
+    for method, matrix in correlations.items():
+        files[f'correlation_{method}.csv'] = matrix.to_csv()
+    return files
+
+# Each stage: (function, names of the stages it reads from). Stages whose inputs are ready run concurrently.
+STAGES = {
+    'extract': (extract_stage, []),
+    'type': (type_stage, ['extract']),
+    'clean': (clean_stage, ['type']),
+    'profile': (profile_stage, ['clean']),
+    'correlation': (correlation_stage, ['clean']),
+    'conversion': (conversion_stage, ['clean']),
+    'report': (report_stage, ['profile', 'correlation', 'conversion']),
+}
+
+def load_config(config_file_path=None):
+    '''
+    Function to load the pipeline configuration, with any values in a .yaml file overriding DEFAULT_CONFIG.
+
+    Parameters:
+        config_file_path (str): Local file path for the .yaml configuration file (DEFAULT_CONFIG is used if None).
+
+    Returns:
+        Dictionary of the configuration.
+    '''
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if config_file_path:
+        with open(config_file_path, 'r') as file:
+            overrides = yaml.safe_load(file) or {}
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(config.get(key), dict):
+                config[key].update(value)
+            else:
+                config[key] = value
+    return config
+
+def _file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_fingerprint(stage, config):
+    # Content hash of data read from outside the pipeline; False if it cannot be known without reading it (the stage always runs).
+    if stage != 'extract':
+        return None
+    if config['source'] == 'csv':
+        return _file_hash(config['path'])
+    if config['source'] == 'database':
+        return False
+    return None
+
+# Project modules (e.g. normality.py) are found here, so changes to the code a stage calls also change its cache key.
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _imported_modules(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            yield node.module.split('.')[0]
+
+def code_fingerprint(function):
+    '''
+    Function to hash the source code of a stage function together with every project module it imports, directly or through other project modules.
+
+    Parameters:
+        function (function): Stage function.
+
+    Returns:
+        Hex digest.
+    '''
+    source = inspect.getsource(function)
+    digest = hashlib.sha256(source.encode())
+    pending = list(_imported_modules(ast.parse(textwrap.dedent(source))))
+    modules = set()
+    while pending:
+        module_name = pending.pop()
+        file_path = os.path.join(_PROJECT_DIR, f'{module_name}.py')
+        if module_name in modules or not os.path.exists(file_path):
+            continue
+        modules.add(module_name)
+        with open(file_path, 'rb') as file:
+            pending += _imported_modules(ast.parse(file.read()))
+    for module_name in sorted(modules):
+        digest.update(f'{module_name}:{_file_hash(os.path.join(_PROJECT_DIR, f"{module_name}.py"))}'.encode())
+    return digest.hexdigest()
+
+def stage_key(stage, config, input_hashes):
+    '''
+    Function to calculate the cache key of a stage from the source code of its function and the project modules it imports, its configuration and the content hashes of its inputs.
+
+    Parameters:
+        stage (str): Name of the stage.
+        config (dict): The stage's section of the configuration.
+        input_hashes (dict): Name of each input stage mapped to the content hash of its output.
+
+    Returns:
+        Hex digest, or None if the stage reads data that cannot be hashed in advance.
+    '''
+    source = _source_fingerprint(stage, config)
+    if source is False:
+        return None
+    function = STAGES[stage][0]
+    payload = {
+        'stage': stage,
+        'code': code_fingerprint(function),
+        'config': config,
+        'inputs': input_hashes,
+        'source': source,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+class _HashingWriter():
+    # File wrapper that hashes everything pickled to it, so outputs are hashed without a second copy in memory.
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha256()
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.file.write(data)
+
+class StageCache():
+    '''
+    This class is used to store the output of each stage on disk, keyed by the stage's cache key, together with the content hash of the output.
+
+    ------------------
+    Parameters:
+    cache_dir: str
+        Directory the outputs are stored in.
+
+    ------------------
+    Methods:
+    lookup()
+        Returns the cached output path and content hash for a stage and key, if present.
+    store()
+        Pickles a stage's output to the cache and returns its path and content hash.
+    load()
+        Loads a pickled output, once per path.
+    '''
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def lookup(self, stage, key):
+        '''
+        This method returns the cached output of a stage.
+
+        Parameters:
+            stage (str): Name of the stage.
+            key (str): Cache key of the stage.
+
+        Returns:
+            (path, output_hash), or None if the output is not cached.
+        '''
+        if key is None:
+            return None
+        path = self._path(stage, key)
+        try:
+            with open(f'{path}.json', 'r') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(f'{path}.pkl'):
+            return None
+        return f'{path}.pkl', meta['output_hash']
+
+    def store(self, stage, key, output):
+        '''
+        This method pickles the output of a stage to the cache. Files are written under a temporary name and then renamed, so an interrupted run never leaves a partial output behind.
+
+        Parameters:
+            stage (str): Name of the stage.
+            key (str): Cache key of the stage (the output is stored under 'latest' if None).
+            output (object): Output of the stage.
+
+        Returns:
+            (path, output_hash)
+        '''
+        path = self._path(stage, key or 'latest')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as file:
+            writer = _HashingWriter(file)
+            pickle.dump(output, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, f'{path}.pkl')
+        output_hash = writer.digest.hexdigest()
+        with open(temporary, 'w') as file:
+            json.dump({'stage': stage, 'output_hash': output_hash, 'created': time.time()}, file)
+        os.replace(temporary, f'{path}.json')
+        with self._lock:
+            self._loaded[f'{path}.pkl'] = output
+        return f'{path}.pkl', output_hash
+
+    def load(self, path):
+        '''
+        This method loads a pickled output. Outputs are kept in memory, so stages sharing an input read it once.
+
+        Parameters:
+            path (str): Path of the pickled output.
+
+        Returns:
+            The output.
+        '''
+        with self._lock:
+            if path not in self._loaded:
+                with open(path, 'rb') as file:
+                    self._loaded[path] = pickle.load(file)
+            return self._loaded[path]
+
+def _run_stage(stage, config, upstream, cache, force):
+    function, dependencies = STAGES[stage]
+    start = time.perf_counter()
+    input_hashes = {dependency: upstream[dependency]['output_hash'] for dependency in dependencies}
+    key = stage_key(stage, config[stage], input_hashes)
+    cached = None if force else cache.lookup(stage, key)
+    if cached is None:
+        inputs = {dependency: cache.load(upstream[dependency]['path']) for dependency in dependencies}
+        path, output_hash = cache.store(stage, key, function(inputs, config[stage]))
+    else:
+        path, output_hash = cached
+    return {'key': key, 'path': path, 'output_hash': output_hash, 'cached': cached is not None, 'time': time.perf_counter() - start}
+
+def _with_dependencies(stages):
+    required = set()
+    def visit(stage):
+        if stage not in required:
+            required.add(stage)
+            for dependency in STAGES[stage][1]:
+                visit(dependency)
+    for stage in stages:
+        visit(stage)
+    return [stage for stage in STAGES if stage in required]
+
+def run_pipeline(config=None, stages=None, force=(), max_workers=None):
+    '''
+    Function to run the pipeline. A stage is skipped when the source code of its function, its configuration and the content of its inputs are unchanged since it last ran.
+    Stages whose inputs are ready run concurrently in a thread pool (profile, correlation and conversion all read the cleaned df).
+
+    Parameters:
+        config (dict): Configuration (see load_config()). DEFAULT_CONFIG is used if None.
+        stages (list of str): Stages to run, together with the stages they depend on. All stages are run if None.
+        force (list of str): Stages to rerun even if their output is cached.
+        max_workers (int): Number of stages run at once (defaults to config['max_workers']).
+
+    Returns:
+        Dictionary of each stage mapped to its result (key, path, output_hash, cached and time).
+    '''
+    config = load_config() if config is None else config
+    pending = _with_dependencies(STAGES if stages is None else stages)
+    unknown = set(force) - set(STAGES)
+    if unknown:
+        raise ValueError(f'Unknown stage(s): {sorted(unknown)}')
+    cache = StageCache(config['cache_dir'])
+    results = {}
+    running = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or config['max_workers']) as executor:
+        while pending or running:
+            for stage in [stage for stage in pending if all(dependency in results for dependency in STAGES[stage][1])]:
+                pending.remove(stage)
+                running[executor.submit(_run_stage, stage, config, results, cache, stage in force)] = stage
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage] = future.result()
+                print(f"{stage}: {'cached' if results[stage]['cached'] else 'ran'} in {results[stage]['time']:.2f} s")
+    if 'report' in results:
+        write_report(cache.load(results['report']['path']), config['output_dir'])
+    return results
+
+def write_report(files, output_dir):
+    '''
+    Function to write the files produced by the report stage to the output directory.
+
+    Parameters:
+        files (dict): File name mapped to its contents.
+        output_dir (str): Directory to write the files to.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    for file_name, contents in files.items():
+        with open(os.path.join(output_dir, file_name), 'w') as file:
+            file.write(contents)
+    print(f'Report saved to {output_dir}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the customer_activity pipeline: extract, type, clean, profile, correlation, conversion and report.')
+    parser.add_argument('--config', help='.yaml file overriding the default configuration')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), help='stages to run (with their dependencies); all stages by default')
+    parser.add_argument('--force', nargs='+', default=[], choices=list(STAGES), help='stages to rerun even if cached')
+    parser.add_argument('--source', choices=['csv', 'database', 'synthetic'], help='overrides extract.source')
+    parser.add_argument('--path', help='overrides extract.path (.csv source)')
+    parser.add_argument('--cache-dir', help='overrides cache_dir')
+    parser.add_argument('--output-dir', help='overrides output_dir')
+    parser.add_argument('--max-workers', type=int, help='number of stages run at once')
+    args = parser.parse_args()
+    config = load_config(args.config)
+    if args.source:
+        config['extract']['source'] = args.source
+    if args.path:
+        config['extract']['path'] = args.path
+    if args.cache_dir:
+        config['cache_dir'] = args.cache_dir
+    if args.output_dir:
+        config['output_dir'] = args.output_dir
+    run_pipeline(config, args.stages, args.force, args.max_workers)
@@ -1,14 +1,78 @@
-from scipy import stats
-from statsmodels.graphics.gofplots import qqplot
-import IPython
-import matplotlib.pyplot as plt
-import matplotlib.style as style
-import missingno as msno
+from correlation import correlation_matrix
+from histograms import histogram as bin_values
+from instrumentation import instrument_class
+from lazy_import import LazyImport
+from missingness import chi_squared_missingness, chi_squared_pair, MissingnessEngine
+from normality import k2_statistic, normality_tests, qq_quantiles
 import numpy as np
-import seaborn as sns
-import plotly.express as px
 import pandas as pd
 
+# Heavy plotting/statistics dependencies are imported on first use to keep `import plotter` fast:
+stats = LazyImport('scipy.stats')
+plt = LazyImport('matplotlib.pyplot')
+sns = LazyImport('seaborn')
+
+def _qq_plot(data, ax=None, fit=False, n_points=1000):
+    '''
+    Function to draw a Q-Q plot of the data against the standard normal distribution from at most n_points precomputed quantiles.
+    A reference line is drawn through the first and third quartiles.
+
+    Parameters:
+        data (Pandas Series/array): Data to plot.
+        ax (matplotlib Axes): Axes to draw on (a new figure is created if None).
+        fit (bool): Whether to standardise the data first.
+        n_points (int): Maximum number of quantiles to plot.
+
+    Returns:
+        The axes containing the Q-Q plot.
+    '''
+    if ax is None:
+        fig, ax = plt.subplots()
+    values = np.asarray(data, dtype=np.float64)
+    if fit:
+        values = (values - np.nanmean(values)) / np.nanstd(values, ddof=1)
+    theoretical, sample = qq_quantiles(values, n_points)
+    ax.plot(theoretical, sample[:, 0], marker='o', linestyle='none')
+    # Reference line through the first and third quartiles (line='q' in statsmodels).
+    theoretical_quartiles = np.array([-0.6744897501960817, 0.6744897501960817])
+    sample_quartiles = np.nanquantile(values, [0.25, 0.75])
+    slope = (sample_quartiles[1] - sample_quartiles[0]) / (theoretical_quartiles[1] - theoretical_quartiles[0])
+    intercept = sample_quartiles[0] - slope * theoretical_quartiles[0]
+    ax.plot(theoretical, intercept + slope * theoretical, color='r')
+    ax.set_xlabel('Theoretical Quantiles')
+    ax.set_ylabel('Sample Quantiles')
+    return ax
+
+def _histogram_bars(binned, ax, label=None):
+    # Bars of the histogram's counts.
+    ax.bar(binned.edges[:-1], binned.counts, width=np.diff(binned.edges), align='edge', label=label)
+    ax.grid(True)
+    if label is not None:
+        ax.legend()
+    return ax
+
+def _density_curve(binned, ax, column_name):
+    # Histogram bars with the kernel density estimate, scaled to counts so it overlays the bars, as seaborn does.
+    widths = np.diff(binned.edges)
+    ax.bar(binned.edges[:-1], binned.counts, width=widths, align='edge', alpha=0.75, edgecolor='white')
+    x, density = binned.kde()
+    ax.plot(x, density * binned.total * widths.mean())
+    ax.set_xlabel(column_name)
+    ax.set_ylabel('Count')
+    sns.despine(ax=ax)
+    return ax
+
+def _cumulative_curve(binned, ax, column_name):
+    # Cumulative probability at each bin edge.
+    cumulative_probability = np.concatenate([[0], binned.cumulative / max(binned.total, 1)])
+    ax.fill_between(binned.edges, cumulative_probability, alpha=0.25)
+    ax.plot(binned.edges, cumulative_probability)
+    ax.set_title('Cumulative Distribution Function (CDF)')
+    ax.set_xlabel(column_name)
+    ax.set_ylabel('Cumulative Probability')
+    return ax
+
+@instrument_class
 class Plotter():
     '''
     This class is used to generate plots to visualize a dataset for statistical analysis.
@@ -37,6 +101,8 @@ class Plotter():
         Plots a heatmap representing the correlation between all variables within a dataset. 
     k2_test()
         Calculate the k^2 statistical analysis of goodness-of-fit to normal distribtution.
+    normality_tests()
+        Runs a battery of normality tests on every numeric variable, optionally before and after each candidate transform.
     qq_plot()
         Generates a Q-Q plot, which is a probability plot for comparing two probability distributions.
     histogram()
@@ -47,10 +113,14 @@ class Plotter():
         Generates a box plot, which displys the summary data including distribution, outliers, median, Q1 and Q3.
     cumulative_distribution_function()
         Generates a CDF plot, which is a graphical representation of the cumulative probability distribution of a random variable.
+    distribution_plots()
+        Generates the histogram, density plot and CDF plot of a numeric variable side by side, from a single binning of the data.
     scatter()
         Plots a scatter plot, which is used to display the relationship between two (usually continuous) numerical variables.
     chi_squared()
         Calculates the chi^2 value to check to see if there is any trend in the frequency of NaNs in column_a, as a function of column_b
+    chi_squared_all()
+        Calculates the chi^2 value for every pair of column containing NaNs and categorical column, returning a table of the results.
     log_transformation()
         Transforms the data, correcting skewness using the Log transform method and generates histogram and Q-Q plot of the transformed data. 
     boxcox()
@@ -66,20 +136,37 @@ class Plotter():
     '''
     def __init__(self, df_name):
         self.df_name = df_name
-    
-    def missing_no_matrix(self):
+
+    def _histogram(self, column_name, bins):
+        # Binned from the current data on every call, so plots always reflect changes made to the df in place.
+        return bin_values(self.df_name[column_name].to_numpy(dtype=np.float64, na_value=np.nan), bins)
+
+    def missing_no_matrix(self, max_rows=1000):
         '''
         This method plots the pattern of missingness (missing values) in the dataset. 
         Complete datasets are represented by grey bars, while missing values are represented by white lines. 
+        Rows are summarised into at most max_rows blocks, shaded by the fraction of missing values in each block, so large datasets plot quickly.
 
         Parameters:
             df_name (Pandas df): Pandas df
+            max_rows (int): Maximum number of row blocks to plot
         
         Returns:
             The matrix plot.
         '''
         try:
-            return msno.matrix(self.df_name)
+            engine = MissingnessEngine(self.df_name)
+            null_fraction, rows_per_block = engine.matrix_summary(max_rows)
+            fig, ax = plt.subplots(figsize=(25, 10))
+            # Present values are drawn dark grey and missing values white, as in missingno.
+            ax.imshow(0.75 * (1 - null_fraction), cmap='Greys', vmin=0, vmax=1, aspect='auto', interpolation='nearest',
+                      extent=(-0.5, len(engine.columns) - 0.5, engine.n_rows, 0))
+            ax.set_xticks(range(len(engine.columns)))
+            ax.set_xticklabels(engine.columns, rotation=45, ha='left')
+            ax.xaxis.tick_top()
+            ax.set_yticks([0, engine.n_rows])
+            ax.grid(False)
+            return ax
         except:
             print('Unable to generate plot')
     
@@ -94,7 +181,16 @@ class Plotter():
             The bar chart.
         '''
         try:
-            return msno.bar(self.df_name)
+            engine = MissingnessEngine(self.df_name)
+            non_null = engine.n_rows - engine.null_counts
+            fig, ax = plt.subplots(figsize=(25, 10))
+            ax.bar(range(len(engine.columns)), non_null / max(engine.n_rows, 1), color='dimgray')
+            ax.set_xticks(range(len(engine.columns)))
+            ax.set_xticklabels(engine.columns, rotation=45, ha='right')
+            ax.set_ylim(0, 1)
+            for position, count in enumerate(non_null):
+                ax.text(position, 1.01, count, ha='center', va='bottom', rotation=45)
+            return ax
         except:
             print('Unable to generate plot')
     
@@ -109,10 +205,13 @@ class Plotter():
             df_name (Pandas df): Pandas df
         
         Returns:
-            The bar chart.
+            The heatmap.
         '''
         try:
-            return msno.heatmap(self.df_name)
+            correlation = MissingnessEngine(self.df_name).nullity_correlation()
+            mask = np.triu(np.ones(correlation.shape, dtype=bool))
+            fig, ax = plt.subplots(figsize=(20, 12))
+            return sns.heatmap(correlation, mask=mask, cmap='RdBu', vmin=-1, vmax=1, annot=True, fmt='.1f', ax=ax)
         except:
             print('Unable to generate plot')
         
@@ -127,12 +226,13 @@ class Plotter():
         Returns:
             The value counts, probabilities, the descrete probability distribution plot, mode, mean and median (if able to calculate).
         '''
+        # The column is scanned once; probabilities, mode, mean and median are all calculated from the value counts.
         value_counts = self.df_name[column_name].value_counts()
         print('Value counts:')
         print(value_counts)
         print()
         # Convert to probabilities
-        probs = self.df_name[column_name].value_counts(normalize=True)
+        probs = (value_counts / value_counts.sum()).rename('proportion')
         print('Probability:')
         print(probs)
         dpd = sns.barplot(y = probs.values, x = probs.index)
@@ -141,13 +241,19 @@ class Plotter():
         plt.ylabel('Probability')
         plt.title('Discrete Probability Distribution')
         plt.show()
-        print(f'The mode of the distribution is {self.df_name[column_name].mode()[0]}')
+        print(f'The mode of the distribution is {value_counts.index[value_counts == value_counts.max()].sort_values()[0]}')
         try:
-            print(f'The mean of the distribution is {self.df_name[column_name].mean()}')
+            values = np.asarray(value_counts.index, dtype=np.float64)
+            counts = value_counts.to_numpy()
+            print(f'The mean of the distribution is {np.dot(values, counts) / counts.sum()}')
         except:
             print('The mean cannot be calculated on this data series')    
         try:
-            print(f'The median of the distribution is {self.df_name[column_name].median()}')
+            order = np.argsort(values)
+            cumulative = np.cumsum(counts[order])
+            total = cumulative[-1]
+            middle = values[order][np.searchsorted(cumulative, [(total + 1) // 2, total // 2 + 1])]
+            print(f'The median of the distribution is {middle.mean()}')
         except:
             print('The median cannot be calculated on this data series') 
 
@@ -168,18 +274,24 @@ class Plotter():
         except:
             print('Unable to generate plot')
 
-    def correlation_matrix(self):
+    def correlation_matrix(self, method='pearson', pairwise=True, chunk_size=None, max_workers=None):
         '''
-        This method generates a heatmap by plotting the data as a colour-encoded matrix indicating the correlation between all variables in a df.
+        This method generates a heatmap by plotting the data as a colour-encoded matrix indicating the correlation between all numeric variables in a df.
+        The correlation is accumulated chunk by chunk (optionally in worker processes), so non-numeric columns are ignored and large dfs can be processed in pieces.
         
         Parameters:
             df_name (Pandas df): Pandas df
+            method (str): 'pearson' or 'spearman' (Spearman ranks are estimated from a sample of each column)
+            pairwise (bool): If True each pair of variables uses every row where both are present, otherwise only rows with no null values are used
+            chunk_size (int): Number of rows per chunk (the whole df is one chunk if None)
+            max_workers (int): Number of worker processes used to accumulate the chunks
         
         Returns:
             The heatmap.
         '''
         try:
-            return sns.heatmap(self.df_name.corr(), annot=True, cmap='coolwarm')
+            matrix = correlation_matrix(self.df_name, method, pairwise, chunk_size, max_workers)
+            return sns.heatmap(matrix, annot=True, cmap='coolwarm')
         except:
             print('Unable to generate plot')
 
@@ -196,9 +308,24 @@ class Plotter():
         Returns:
             The k^2 statistical analysis.
         '''
-        data = self.df_name[column_name]
-        stat, p = stats.normaltest(data, nan_policy='omit')
-        print('Statistics = %.3f, p = %.3f' % (stat, p))
+        k2, p_value = k2_statistic(self.df_name[[column_name]].to_numpy(dtype=np.float64, na_value=np.nan))
+        print('Statistics = %.3f, p = %.3f' % (k2[0], p_value[0]))
+
+    def normality_tests(self, columns=None, transforms=False):
+        '''
+        This method runs D'Agostino's K^2, Shapiro-Wilk (on a sample), Anderson-Darling, skewness and kurtosis for every numeric column at once.
+        Optionally the tests are repeated after the log, Box-Cox and Yeo-Johnson transforms, so the transform to use for each column can be chosen from one table.
+        For each test a p-value of less than 0.05 suggests the data are not normally distributed.
+                
+        Parameters:
+            df_name (Pandas df): Pandas df
+            columns (list of str/object): Names of variables to be analysed (defaults to all numeric variables)
+            transforms (bool or list of str): Whether to also test the transformed data, or the names of the transforms to test
+
+        Returns:
+            A table of the statistics and p-values for each variable and transform.
+        '''
+        return normality_tests(self.df_name, columns, transforms)
 
     def qq_plot(self, column_name):
         '''
@@ -211,36 +338,41 @@ class Plotter():
         Returns:
             The q-q plot.
         '''
-        plot = qqplot(self.df_name[column_name], scale=1, line='q')
+        _qq_plot(self.df_name[column_name])
         plt.show()
     
-    def histogram(self, column_name):
+    def histogram(self, column_name, bins=25):
         '''
         This method generates a hitogram to plot the distribution of a numeric variables values as a series of bars. 
         Each bar is grouped into a bin (which may need to be adjusted depending on the dataset).
+        The values are binned in one vectorised pass; use distribution_plots() to draw the histogram, density and CDF from the same bins.
                 
         Parameters:
             df_name (Pandas df): Pandas df
             column_name (str/object): Name of variable to be analysed
+            bins (int): Number of bins
 
         Returns:
             The histogram.
         '''
-        self.df_name[column_name].hist(bins=25, legend=True)
+        fig, ax = plt.subplots()
+        return _histogram_bars(self._histogram(column_name, bins), ax, column_name)
 
-    def density_plot(self, column_name):
+    def density_plot(self, column_name, bins=25):
         '''
         This method generates a density plot, which is essentially a smoothed histogram. 
+        The histogram and the kernel density estimate are both drawn from one binning of the column.
                 
         Parameters:
             df_name (Pandas df): Pandas df
             column_name (str/object): Name of variable to be analysed
+            bins (int): Number of bins
 
         Returns:
             The density plot.
         '''
-        sns.histplot(data = self.df_name, x = column_name, kde=True)
-        sns.despine()
+        fig, ax = plt.subplots()
+        return _density_curve(self._histogram(column_name, bins), ax, column_name)
     
     def boxplot(self, column_name):
         '''
@@ -255,22 +387,42 @@ class Plotter():
         '''
         sns.boxplot(y = self.df_name[column_name], color='royalblue', showfliers=True)
      
-    def cumulative_distribution_function(self, column_name):
+    def cumulative_distribution_function(self, column_name, bins=25):
         '''
         This method generates a cumulative distribution function (CDF) plot. 
         This is a graphical representation of the cumulative probability distribution of a random variable. The x-axis covers the range of values the variable takes, while the y-axis represents the cumulative probability from 0 to 1. The plot displays how the probabilities accumulate as the variable increases, providing insights into the overall distribution of the data, including central tendency, spread, and skew. It is particularly useful for comparing multiple distributions or assessing the goodness-of-fit for a given distribution.
+        The cumulative probability is drawn from the binned counts of the column.
                 
         Parameters:
             df_name (Pandas df): Pandas df
             column_name (str/object): Name of variable to be analysed
+            bins (int): Number of bins
 
         Returns:
             The CDF plot.
         '''
-        sns.histplot(self.df_name[column_name], cumulative=True, stat='density', element='poly')
-        plt.title('Cumulative Distribution Function (CDF)')
-        plt.xlabel(column_name)
-        plt.ylabel('Cumulative Probability')
+        fig, ax = plt.subplots()
+        _cumulative_curve(self._histogram(column_name, bins), ax, column_name)
+
+    def distribution_plots(self, column_name, bins=25):
+        '''
+        This method generates the histogram, density plot and cumulative distribution function (CDF) plot of a numeric variable side by side.
+        The column is binned once and all three plots are drawn from the same bins.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            column_name (str/object): Name of variable to be analysed
+            bins (int): Number of bins
+
+        Returns:
+            The axes of the three plots.
+        '''
+        binned = self._histogram(column_name, bins)
+        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+        _histogram_bars(binned, axes[0], column_name)
+        _density_curve(binned, axes[1], column_name)
+        _cumulative_curve(binned, axes[2], column_name)
+        return axes
     
     def scatter(self, column_a, column_b):
         '''
@@ -302,11 +454,26 @@ class Plotter():
         Returns:
             The chi^2 statistical analysis.
         '''
-        self.df_name['missing_values'] = self.df_name[column_a].isnull()
-        contingency_table = pd.crosstab(self.df_name['missing_values'], self.df_name[column_b])
-        chi2, p, dof, expected = stats.chi2_contingency(contingency_table)
+        chi2, p_value, dof = chi_squared_pair(self.df_name, column_a, column_b)
         print(f"Chi-square statistic = {chi2}")
-        print(f"p-value = {p}")
+        print(f"p-value = {p_value}")
+
+    def chi_squared_all(self, columns=None, categorical_columns=None, max_workers=None):
+        '''
+        This method calculates the chi^2 value for every pair of column containing NaNs and categorical column, to check for any trend in the frequency of NaNs as a function of the categorical column.
+        The pairs are tested in parallel and the df is not modified.
+        A p-value greater than 0.05 suggests that the NaNs are randomly distributed with respect to the categorical column.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            columns (list of str/object): Names of variables to test for missingness (defaults to all columns containing NaNs)
+            categorical_columns (list of str/object): Names of variables to test against (defaults to all categorical columns)
+            max_workers (int): Maximum number of threads used to test the pairs
+
+        Returns:
+            A table of the chi^2 statistic, p-value and degrees of freedom for each pair.
+        '''
+        return chi_squared_missingness(self.df_name, columns, categorical_columns, max_workers)
 
     def log_transformation(self, column_name):
         '''
@@ -323,7 +490,7 @@ class Plotter():
         log = self.df_name[column_name].map(lambda i: np.log(i) if i > 0 else 0)
         t = sns.histplot(log, label = 'Skewness: %.2f' % (log.skew()), kde=True)
         t.legend()
-        qq_plot = qqplot(log, scale = 1 ,line = 'q', fit=True)
+        qq_plot = _qq_plot(log, fit=True)
         plt.show()
     
     def boxcox(self, column_name):
@@ -343,7 +510,7 @@ class Plotter():
         boxcox= pd.Series(boxcox[0])
         t=sns.histplot(boxcox,label="Skewness: %.2f"%(boxcox.skew()), kde=True)
         t.legend()
-        qq_plot = qqplot(boxcox, scale = 1 ,line = 'q', fit=True)
+        qq_plot = _qq_plot(boxcox, fit=True)
         plt.show()
     
     def yeojohnson(self, column_name):
@@ -362,7 +529,7 @@ class Plotter():
         yeojohnson = pd.Series(yeojohnson[0])
         t=sns.histplot(yeojohnson,label="Skewness: %.2f"%(yeojohnson.skew()), kde=True)
         t.legend()
-        qq_plot = qqplot(yeojohnson, scale = 1 ,line = 'q', fit=True)
+        qq_plot = _qq_plot(yeojohnson, fit=True)
         plt.show()
     
     def skew_subplots(self, column_name):
@@ -387,7 +554,7 @@ class Plotter():
         sns.histplot(ax=axs[0,0], data=self.df_name[column_name], label = 'Skewness: %.2f' % (self.df_name[column_name].skew()), kde=True)
         axs[0,0].set_title('Original Data Histogram')
         axs[0,0].legend()
-        qqplot(ax=axs[1,0], data=self.df_name[column_name], scale = 1 ,line = 'q', fit=True)
+        _qq_plot(self.df_name[column_name], ax=axs[1,0], fit=True)
         axs[1,0].set_title('Original Data Q-Q Plot')
 
         # log transform data
@@ -395,7 +562,7 @@ class Plotter():
         sns.histplot(ax=axs[0, 1], data=log, label = 'Skewness: %.2f' % (log.skew()), kde=True)
         axs[0,1].set_title('Log Transformed Data Histogram')
         axs[0,1].legend()
-        qqplot(ax=axs[1,1], data=log, scale = 1 ,line = 'q', fit=True)
+        _qq_plot(log, ax=axs[1,1], fit=True)
         axs[1,1].set_title('Log Transformed Data Q-Q Plot')
 
         # box-cox data
@@ -406,7 +573,7 @@ class Plotter():
             sns.histplot(ax=axs[0, 2], data=boxcox, label = 'Skewness: %.2f' % (boxcox.skew()), kde=True)
             axs[0,2].set_title('Box-Cox Data Histogram')
             axs[0,2].legend()
-            qqplot(ax=axs[1,2], data=boxcox, scale = 1 ,line = 'q', fit=True)
+            _qq_plot(boxcox, ax=axs[1,2], fit=True)
             axs[1,2].set_title('Box-Cox Data Q-Q Plot')
         except(ValueError):
             print('Box-Cox ValueError: Data must be positive.')
@@ -418,7 +585,7 @@ class Plotter():
         sns.histplot(ax=axs[0, 3], data=yeojohnson, label = 'Skewness: %.2f' % (yeojohnson.skew()), kde=True)
         axs[0,3].set_title('Yeo-Johnson Data Histogram')
         axs[0,3].legend()
-        qqplot(ax=axs[1,3], data=yeojohnson, scale = 1 ,line = 'q', fit=True)
+        _qq_plot(yeojohnson, ax=axs[1,3], fit=True)
         axs[1,3].set_title('Yeo-Johnson Data Q-Q Plot')
         
         # Display the plot
@@ -0,0 +1,130 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+class SegmentTaxonomy():
+    '''
+    This class is used to declare how the categories of a column are grouped into segments, e.g. operating systems into Desktop and Mobile.
+    Any category not listed falls into the "everything else" segment.
+    The taxonomy is compiled to a lookup array from category code to segment code, so it is applied to a df (or chunk) with a single vectorised take.
+
+    ------------------
+    Parameters:
+    column_name: str
+        Column header the taxonomy applies to.
+    segments: dict
+        Segment name mapped to the list of categories in that segment.
+    other: str
+        Name of the segment for all remaining categories.
+
+    ------------------
+    Attributes:
+    column_name: str
+        Column header the taxonomy applies to.
+    segments: dict
+        Segment name mapped to the list of categories in that segment.
+    other: str
+        Name of the segment for all remaining categories.
+    segment_names: list of str
+        Names of all segments, with the "everything else" segment last.
+
+    ------------------
+    Methods:
+    compile()
+        Returns the lookup array from category code to segment code for the given categories.
+    segment_codes()
+        Returns the segment code of each row of a df.
+    apply()
+        Returns the segment of each row of a df as a categorical Pandas Series.
+    counts()
+        Returns the number of rows in each segment, without copying the df.
+    '''
+    def __init__(self, column_name, segments, other='Other'):
+        self.column_name = column_name
+        self.segments = {name: list(categories) for name, categories in segments.items()}
+        self.other = other
+        self.segment_names = list(self.segments) + ([other] if other not in self.segments else [])
+        self._segment_of = {}
+        for position, (name, categories) in enumerate(self.segments.items()):
+            for category in categories:
+                if category in self._segment_of:
+                    raise ValueError(f'{category} is listed in more than one segment.')
+                self._segment_of[category] = position
+        self._compiled = None
+
+    def compile(self, categories):
+        '''
+        This method returns the lookup array from category code to segment code for the given categories.
+        The last entry maps the null code (-1) to -1. The most recent lookup is cached and reused while the categories are unchanged.
+
+        Parameters:
+            categories (Pandas Index/list): Categories of the column, in code order.
+
+        Returns:
+            np.ndarray lookup array.
+        '''
+        categories = pd.Index(categories)
+        if self._compiled is not None and self._compiled[0].equals(categories):
+            return self._compiled[1]
+        other_code = self.segment_names.index(self.other)
+        lookup = np.array([self._segment_of.get(category, other_code) for category in categories] + [-1], dtype=np.int64)
+        self._compiled = (categories, lookup)
+        return lookup
+
+    def segment_codes(self, df_name):
+        '''
+        This method returns the segment code of each row of a df (-1 for nulls).
+        Category columns use their existing codes; other columns are factorised first.
+
+        Parameters:
+            df_name (Pandas df): Pandas df (or chunk) containing the taxonomy's column.
+
+        Returns:
+            np.ndarray of segment codes.
+        '''
+        series = df_name[self.column_name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, categories = pd.factorize(series)
+        # Index -1 (nulls) picks the last entry of the lookup array, which is -1.
+        return self.compile(categories).take(codes)
+
+    def apply(self, df_name):
+        '''
+        This method returns the segment of each row of a df.
+
+        Parameters:
+            df_name (Pandas df): Pandas df (or chunk) containing the taxonomy's column.
+
+        Returns:
+            Categorical Pandas Series of segment names, with the same index as the df.
+        '''
+        codes = self.segment_codes(df_name)
+        return pd.Series(pd.Categorical.from_codes(codes, categories=self.segment_names), index=df_name.index, name=self.column_name)
+
+    def counts(self, df_name):
+        '''
+        This method returns the number of rows in each segment, without copying the df.
+
+        Parameters:
+            df_name (Pandas df): Pandas df (or chunk) containing the taxonomy's column.
+
+        Returns:
+            Pandas Series of counts indexed by segment name.
+        '''
+        codes = self.segment_codes(df_name)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.segment_names))
+        return pd.Series(counts, index=pd.Index(self.segment_names, name=self.column_name), name='count')
+
+# Segment taxonomies used in the analysis of the customer_activity dataset.
+# "Other" operating systems are treated as mobile operating systems.
+OPERATING_SYSTEM_SEGMENTS = SegmentTaxonomy('operating_systems', {'Desktop': ['Windows', 'MACOS']}, other='Mobile')
+
+TRAFFIC_SEGMENTS = SegmentTaxonomy('traffic_type', {
+    'Direct traffic': ['Google search', 'Bing search', 'Direct Traffic', 'Yahoo Search', 'Yandex search', 'DuckDuckGo search'],
+    'Social traffic': ['Twitter', 'Youtube channel', 'Instagram Page', 'Facebook page', 'Tik Tok page', 'Pinterest'],
+}, other='Ads traffic')
+
+AD_TRAFFIC_SEGMENTS = SegmentTaxonomy('traffic_type', {'ads': ['Facebook ads', 'Instagram ads', 'Youtube ads', 'Tik Tok ads']}, other='Other')
@@ -0,0 +1,159 @@
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+# Category weights, based on the customer_activity table (before low-count categories were grouped into 'Other').
+MONTHS = {'Feb': 0.015, 'Mar': 0.155, 'May': 0.273, 'June': 0.023, 'Jul': 0.035, 'Aug': 0.035, 'Sep': 0.036, 'Oct': 0.045, 'Nov': 0.243, 'Dec': 0.14}
+OPERATING_SYSTEMS = {'Windows': 0.533, 'MACOS': 0.216, 'Android': 0.21, 'iOS': 0.031, 'ChromeOS': 0.005, 'Ubuntu': 0.003, 'Other': 0.002}
+BROWSERS = {'Google Chrome': 0.625, 'Safari': 0.205, 'Mozilla Firefox': 0.067, 'Microsoft Edge': 0.047, 'Internet Explorer': 0.013,
+            'Samsung Internet': 0.012, 'Opera': 0.011, 'Android': 0.01, 'QQ': 0.002, 'Sogou Explorer': 0.002, 'Yandex': 0.002,
+            'UC Browser': 0.002, 'Undetermined': 0.001, 'Other': 0.001}
+REGIONS = {'North America': 0.39, 'Western Europe': 0.17, 'Eastern Europe': 0.1, 'Asia': 0.1, 'South America': 0.07,
+           'Africa': 0.067, 'Northern Africa': 0.049, 'Southern Africa': 0.027, 'Oceania': 0.027}
+TRAFFIC_TYPES = {'Google search': 0.34, 'Bing search': 0.07, 'Direct Traffic': 0.025, 'Yahoo Search': 0.004, 'Yandex search': 0.0005,
+                 'DuckDuckGo search': 0.0005, 'Youtube channel': 0.04, 'Twitter': 0.03, 'Instagram Page': 0.015, 'Facebook page': 0.007,
+                 'Tik Tok page': 0.001, 'Pinterest': 0.001, 'Facebook ads': 0.19, 'Instagram ads': 0.13, 'Youtube ads': 0.06,
+                 'Tik Tok ads': 0.045, 'Affiliate marketing': 0.03, 'Newsletter': 0.006, 'Other': 0.005}
+VISITOR_TYPES = {'Returning_Visitor': 0.856, 'New_Visitor': 0.137, 'Other': 0.007}
+WEEKEND_RATE = 0.23
+REVENUE_RATE = 0.155
+
+# Relative likelihood of a purchase by month and visitor type.
+_MONTH_REVENUE_FACTOR = {'Feb': 0.18, 'Mar': 0.6, 'May': 0.66, 'June': 0.45, 'Jul': 1.05, 'Aug': 1.1, 'Sep': 1.05, 'Oct': 1.55, 'Nov': 1.6, 'Dec': 1.04}
+_VISITOR_REVENUE_FACTOR = {'Returning_Visitor': 0.93, 'New_Visitor': 1.6, 'Other': 1.1}
+
+# Columns that receive null values when null_rate > 0 (the integer page counts stay complete, as in the source table).
+NULLABLE_COLUMNS = ['administrative_duration', 'informational_duration', 'product_related_duration', 'exit_rates', 'operating_systems', 'browser']
+
+COLUMNS = ['administrative', 'administrative_duration', 'informational', 'informational_duration', 'product_related',
+           'product_related_duration', 'bounce_rates', 'exit_rates', 'page_values', 'month', 'operating_systems', 'browser',
+           'region', 'traffic_type', 'visitor_type', 'weekend', 'revenue']
+
+def _weights(categories):
+    weights = np.array(list(categories.values()), dtype=np.float64)
+    return weights / weights.sum()
+
+def _draw_codes(rng, categories, n_rows):
+    # Category codes drawn by inverting the cumulative weights, which is much faster than rng.choice for large n_rows.
+    return np.searchsorted(np.cumsum(_weights(categories)), rng.random(n_rows), side='right').clip(max=len(categories) - 1)
+
+def _pages_and_duration(rng, n_rows, zero_rate, extra_pages, log_seconds_per_page, sigma):
+    # Zero-inflated page counts, with a log-normal time spent per page.
+    pages = np.where(rng.random(n_rows) < zero_rate, 0, 1 + rng.poisson(extra_pages, n_rows))
+    duration = pages * rng.lognormal(log_seconds_per_page, sigma, n_rows)
+    return pages.astype(np.int64), duration
+
+def _revenue_probability(month_codes, visitor_codes):
+    month_factor = np.array([_MONTH_REVENUE_FACTOR[month] for month in MONTHS])
+    visitor_factor = np.array([_VISITOR_REVENUE_FACTOR[visitor] for visitor in VISITOR_TYPES])
+    # Scale so the expected revenue rate over all sessions is REVENUE_RATE.
+    scale = REVENUE_RATE / (np.dot(_weights(MONTHS), month_factor) * np.dot(_weights(VISITOR_TYPES), visitor_factor))
+    return np.clip(scale * month_factor[month_codes] * visitor_factor[visitor_codes], 0, 1)
+
+def generate_customer_activity_chunk(n_rows, seed=0, null_rate=0.0, start=0):
+    '''
+    Function to generate a df of synthetic sessions with the schema and approximate distributions of the customer_activity table.
+    Categorical columns are returned with the category data type.
+
+    Parameters:
+        n_rows (int): Number of rows.
+        seed (int/np.random.SeedSequence): Seed for the random number generator.
+        null_rate (float): Fraction of values set to null in each of NULLABLE_COLUMNS.
+        start (int): First value of the df's index, so chunks can be concatenated.
+
+    Returns:
+        Pandas df of synthetic sessions.
+    '''
+    rng = np.random.default_rng(seed)
+    month = _draw_codes(rng, MONTHS, n_rows)
+    visitor_type = _draw_codes(rng, VISITOR_TYPES, n_rows)
+    revenue = rng.random(n_rows) < _revenue_probability(month, visitor_type)
+
+    administrative, administrative_duration = _pages_and_duration(rng, n_rows, 0.46, 3.3, 3.3, 1.0)
+    informational, informational_duration = _pages_and_duration(rng, n_rows, 0.79, 1.4, 3.8, 1.2)
+    product_related = 1 + rng.negative_binomial(1.2, 1.2 / (1.2 + 31), n_rows)
+    product_related_duration = product_related * rng.lognormal(3.3, 0.9, n_rows)
+    bounce_rates = np.where(rng.random(n_rows) < 0.45, 0.0, rng.beta(0.5, 10, n_rows))
+    exit_rates = np.clip(bounce_rates + rng.beta(1.5, 35, n_rows), 0, 0.2)
+    # Sessions that generated revenue usually visited pages with a page value.
+    has_page_value = rng.random(n_rows) < np.where(revenue, 0.9, 0.1)
+    page_values = np.where(has_page_value, np.where(revenue, rng.lognormal(3.0, 1.0, n_rows), rng.lognormal(1.5, 1.2, n_rows)), 0.0)
+
+    data = {
+        'administrative': administrative,
+        'administrative_duration': administrative_duration,
+        'informational': informational,
+        'informational_duration': informational_duration,
+        'product_related': product_related.astype(np.int64),
+        'product_related_duration': product_related_duration,
+        'bounce_rates': bounce_rates,
+        'exit_rates': exit_rates,
+        'page_values': page_values,
+        'month': pd.Categorical.from_codes(month, categories=list(MONTHS)),
+        'operating_systems': pd.Categorical.from_codes(_draw_codes(rng, OPERATING_SYSTEMS, n_rows), categories=list(OPERATING_SYSTEMS)),
+        'browser': pd.Categorical.from_codes(_draw_codes(rng, BROWSERS, n_rows), categories=list(BROWSERS)),
+        'region': pd.Categorical.from_codes(_draw_codes(rng, REGIONS, n_rows), categories=list(REGIONS)),
+        'traffic_type': pd.Categorical.from_codes(_draw_codes(rng, TRAFFIC_TYPES, n_rows), categories=list(TRAFFIC_TYPES)),
+        'visitor_type': pd.Categorical.from_codes(visitor_type, categories=list(VISITOR_TYPES)),
+        'weekend': rng.random(n_rows) < WEEKEND_RATE,
+        'revenue': revenue,
+    }
+    df = pd.DataFrame(data, index=pd.RangeIndex(start, start + n_rows))
+    if null_rate > 0:
+        for column in NULLABLE_COLUMNS:
+            missing = rng.random(n_rows) < null_rate
+            df.loc[missing, column] = np.nan
+    return df
+
+def generate_customer_activity_chunks(n_rows, chunk_size=1000000, seed=0, null_rate=0.0):
+    '''
+    Function to generate synthetic customer_activity data one chunk at a time, so datasets larger than memory can be streamed.
+    Each chunk has an independent random stream, so the data does not depend on how it is consumed.
+
+    Parameters:
+        n_rows (int): Total number of rows.
+        chunk_size (int): Number of rows in each chunk.
+        seed (int): Seed for the random number generator.
+        null_rate (float): Fraction of values set to null in each of NULLABLE_COLUMNS.
+
+    Returns:
+        Generator of Pandas dfs.
+    '''
+    n_chunks = -(-n_rows // chunk_size)
+    for position, chunk_seed in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        start = position * chunk_size
+        yield generate_customer_activity_chunk(min(chunk_size, n_rows - start), chunk_seed, null_rate, start)
+
+def generate_customer_activity(n_rows, chunk_size=1000000, seed=0, null_rate=0.0):
+    '''
+    Function to generate a df of synthetic customer_activity data, e.g. from 10,000 up to 50,000,000 rows.
+    The data is generated in chunks to limit the memory needed for intermediate arrays.
+
+    Parameters:
+        n_rows (int): Number of rows.
+        chunk_size (int): Number of rows generated at a time.
+        seed (int): Seed for the random number generator.
+        null_rate (float): Fraction of values set to null in each of NULLABLE_COLUMNS.
+
+    Returns:
+        Pandas df of synthetic sessions.
+    '''
+    chunks = list(generate_customer_activity_chunks(n_rows, chunk_size, seed, null_rate))
+    if not chunks:
+        return generate_customer_activity_chunk(0, seed, null_rate)
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+
+def save_customer_activity_csv(file_path, n_rows, chunk_size=1000000, seed=0, null_rate=0.0):
+    '''
+    Function to write synthetic customer_activity data to a .csv file one chunk at a time, in the same format as RDSDatabaseConnector.save_data().
+
+    Parameters:
+        file_path (str): Path of the .csv file.
+        n_rows (int): Number of rows.
+        chunk_size (int): Number of rows generated and written at a time.
+        seed (int): Seed for the random number generator.
+        null_rate (float): Fraction of values set to null in each of NULLABLE_COLUMNS.
+    '''
+    for position, chunk in enumerate(generate_customer_activity_chunks(n_rows, chunk_size, seed, null_rate)):
+        chunk.to_csv(file_path, mode='w' if position == 0 else 'a', header=position == 0, index=False)
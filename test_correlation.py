@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+import pandas as pd
+from correlation import correlation_matrix
+
+class CorrelationMatrixTest(unittest.TestCase):
+    '''
+    Tests that the merged chunk accumulators give the same correlation matrix as Pandas df.corr().
+    '''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 1003
+        duration = rng.lognormal(3, 1, n_rows)
+        bounce_rates = 0.5 * rng.random(n_rows) + 0.001 * duration
+        exit_rates = bounce_rates + 0.1 * rng.random(n_rows)
+        page_values = rng.exponential(5, n_rows)
+        for values, fraction in [(duration, 0.1), (bounce_rates, 0.05), (page_values, 0.2)]:
+            values[rng.random(n_rows) < fraction] = np.nan
+        self.df = pd.DataFrame({
+            'duration': duration,
+            'bounce_rates': bounce_rates,
+            'exit_rates': exit_rates,
+            # Large offset, so the co-moments would lose precision if calculated from raw sums.
+            'page_values': page_values + 1e6,
+            'weekend': rng.random(n_rows) < 0.23,
+            'region': rng.choice(['Asia', 'Africa', 'Oceania'], n_rows),
+        })
+        self.numeric = self.df.select_dtypes(include=['number', 'bool']).astype(np.float64)
+
+    def assert_matrix_equal(self, result, expected):
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-8, atol=1e-12)
+
+    def test_pairwise_matches_corr(self):
+        self.assert_matrix_equal(correlation_matrix(self.df), self.numeric.corr())
+
+    def test_chunk_sizes(self):
+        expected = self.numeric.corr()
+        # Includes chunks that do not divide the rows evenly and chunks with a single row.
+        for chunk_size in [1, 7, 100, 500, 2000]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assert_matrix_equal(correlation_matrix(self.df, chunk_size=chunk_size), expected)
+
+    def test_list_of_chunks(self):
+        chunks = [self.df.iloc[:300], self.df.iloc[300:301], self.df.iloc[301:]]
+        self.assert_matrix_equal(correlation_matrix(chunks), self.numeric.corr())
+
+    def test_complete_rows_only(self):
+        expected = self.numeric.dropna().corr()
+        for chunk_size in [None, 64]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assert_matrix_equal(correlation_matrix(self.df, pairwise=False, chunk_size=chunk_size), expected)
+
+    def test_worker_processes(self):
+        self.assert_matrix_equal(correlation_matrix(self.df, chunk_size=250, max_workers=2), self.numeric.corr())
+        self.assert_matrix_equal(
+            correlation_matrix(self.df, pairwise=False, chunk_size=250, max_workers=2),
+            self.numeric.dropna().corr(),
+        )
+
+    def test_spearman_without_nulls(self):
+        # Ranks are exact when the rank sample holds every value; with nulls Pandas re-ranks each pair, so only complete columns are compared.
+        columns = ['exit_rates', 'weekend']
+        expected = self.numeric[columns].corr(method='spearman')
+        result = correlation_matrix(self.df[columns], method='spearman', chunk_size=100, sample_size=len(self.df))
+        self.assert_matrix_equal(result, expected)
+
+if __name__ == '__main__':
+    unittest.main()
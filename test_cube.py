@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import pandas as pd
+from cube import AggregateCube
+
+class AggregateCubeTest(unittest.TestCase):
+    '''
+    Tests that queries answered from the cube match the same group-by on the df.
+    '''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 1000
+        # Category order differs from alphabetical order.
+        months = ['Feb', 'Mar', 'May', 'June', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        self.df = pd.DataFrame({
+            'month': pd.Categorical(rng.choice(months, n_rows), categories=months, ordered=True),
+            'visitor_type': rng.choice(['Returning_Visitor', 'New_Visitor', 'Other'], n_rows, p=[0.8, 0.15, 0.05]),
+            'revenue': rng.random(n_rows) < 0.15,
+            'duration': rng.lognormal(3, 1, n_rows),
+        })
+        self.cube = AggregateCube(self.df, ['month', 'visitor_type', 'revenue'], ['duration'])
+
+    def test_counts_and_sums(self):
+        result = self.cube.counts(['month', 'visitor_type'])
+        expected = self.df.groupby(['month', 'visitor_type'], observed=True).size()
+        self.assertEqual(list(result.index), list(expected.index))
+        self.assertEqual(result.tolist(), expected.tolist())
+        expected = self.df[self.df['revenue']].groupby('visitor_type')['duration'].sum()
+        pd.testing.assert_series_equal(self.cube.sums('duration', 'visitor_type', where={'revenue': True}), expected)
+
+    def test_value_counts_in_category_order(self):
+        for normalize in [False, True]:
+            with self.subTest(normalize=normalize):
+                result = self.cube.value_counts('visitor_type', by='month', normalize=normalize)
+                expected = self.df.groupby('month', observed=True)['visitor_type'].value_counts(normalize=normalize)
+                # Months follow the category order, not alphabetical order.
+                self.assertEqual(list(result.index.get_level_values('month').unique()), list(self.df['month'].cat.categories))
+                for month, group in result.groupby(level='month', sort=False):
+                    self.assertTrue((np.diff(group.to_numpy()) <= 0).all())
+                    self.assertEqual(group.droplevel('month').sort_index().tolist(), expected.xs(month, level='month').sort_index().tolist())
+
+    def test_value_counts_without_groups(self):
+        result = self.cube.value_counts('month')
+        expected = self.df['month'].value_counts()
+        self.assertEqual(result.tolist(), expected.tolist())
+        self.assertEqual(dict(result), dict(expected))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+import db_utils
+from db_utils import LocalDatabasePool, extract_tables_async
+
+class ExtractTablesAsyncTest(unittest.IsolatedAsyncioTestCase):
+    '''
+    Tests of extract_tables_async() against the LocalDatabasePool stand-in, so no database credentials are needed.
+    '''
+    def setUp(self):
+        self.sessions = pd.DataFrame({
+            'session_id': range(10),
+            'month': ['May', 'Nov', 'Dec', 'May', 'Nov', 'May', 'Mar', 'May', 'Nov', 'Dec'],
+            'revenue': [0, 1, 0, 0, 1, 1, 0, 0, 0, 1],
+        })
+        self.regions = pd.DataFrame({'region': ['Asia', 'Oceania', 'Africa'], 'sessions': [4, 3, 3]})
+        self.pool = LocalDatabasePool({'sessions': self.sessions, 'regions': self.regions}, latency=0.01)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.prefix = self.directory.name + os.sep
+
+    async def extract(self, tables, **kwargs):
+        return await extract_tables_async(None, tables, self.prefix, pool=self.pool, **kwargs)
+
+    async def test_tables_and_partitions(self):
+        results = await self.extract([
+            'sessions',
+            'regions',
+            {'name': 'sessions_may', 'query': 'SELECT * FROM sessions WHERE month = $1', 'args': ['May']},
+        ], batch_size=3, keep_dfs=True)
+        self.assertEqual([result['name'] for result in results], ['sessions', 'regions', 'sessions_may'])
+        self.assertEqual([result['rows'] for result in results], [10, 3, 4])
+        for result, expected in zip(results, [self.sessions, self.regions, self.sessions[self.sessions['month'] == 'May']]):
+            self.assertNotIn('error', result)
+            self.assertEqual(result['path'], f"{self.prefix}{result['name']}.csv")
+            pd.testing.assert_frame_equal(pd.read_csv(result['path']), expected.reset_index(drop=True))
+            pd.testing.assert_frame_equal(result['df'], expected.reset_index(drop=True))
+
+    async def test_empty_partition_writes_header(self):
+        result = (await self.extract([{'name': 'sessions_jan', 'query': 'SELECT * FROM sessions WHERE month = $1', 'args': ['Jan']}]))[0]
+        self.assertEqual(result['rows'], 0)
+        written = pd.read_csv(result['path'])
+        self.assertEqual(len(written), 0)
+        self.assertEqual(list(written.columns), list(self.sessions.columns))
+
+    async def test_failed_table_does_not_stop_others(self):
+        results = await self.extract(['missing', 'sessions'])
+        self.assertIsInstance(results[0]['error'], ValueError)
+        self.assertIsNone(results[0]['path'])
+        self.assertFalse(os.path.exists(f'{self.prefix}missing.csv'))
+        self.assertNotIn('error', results[1])
+        self.assertEqual(results[1]['rows'], 10)
+
+    async def test_failure_partway_removes_partial_file(self):
+        original_fetch = db_utils._LocalCursor.fetch
+
+        async def fetch_then_fail(cursor, n):
+            if cursor._position > 0:
+                raise ConnectionError('connection lost')
+            return await original_fetch(cursor, n)
+
+        with mock.patch.object(db_utils._LocalCursor, 'fetch', fetch_then_fail):
+            result = (await self.extract(['sessions'], batch_size=3))[0]
+        self.assertIsInstance(result['error'], ConnectionError)
+        self.assertIsNone(result['path'])
+        self.assertFalse(os.path.exists(f'{self.prefix}sessions.csv'))
+
+    async def test_tables_load_concurrently(self):
+        self.pool.latency = 0.05
+        start = time.perf_counter()
+        tables = [{'name': f'{table}_{copy}', 'query': f'SELECT * FROM {table}'} for copy in range(2) for table in ('sessions', 'regions')]
+        results = await self.extract(tables, max_concurrency=4)
+        total = time.perf_counter() - start
+        busy = sum(result['elapsed'] - result['wait_time'] for result in results)
+        # Run one at a time the total would be the sum; concurrently it approaches the slowest table.
+        self.assertLess(total, 0.75 * busy)
+
+    async def test_concurrency_is_bounded(self):
+        results = await self.extract(['sessions', 'regions'], max_concurrency=1)
+        # With one query at a time, one table waits for the whole of the other.
+        first, second = sorted(results, key=lambda result: result['wait_time'])
+        self.assertGreaterEqual(second['wait_time'], first['elapsed'] - first['wait_time'] - 0.005)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+import pandas as pd
+from scipy import stats
+from missingness import chi_squared_missingness, chi_squared_pair
+
+class ChiSquaredMissingnessTest(unittest.TestCase):
+    '''
+    Tests that the chi^2 tests built from category codes match stats.chi2_contingency on pd.crosstab, as Plotter.chi_squared() originally calculated them.
+    '''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 2000
+        region = rng.choice(['Asia', 'Africa', 'Oceania', 'Western Europe'], n_rows).astype(object)
+        region[rng.random(n_rows) < 0.05] = None
+        duration = rng.lognormal(3, 1, n_rows)
+        # Nulls depend on the region, so some pairs have a clear trend.
+        duration[rng.random(n_rows) < np.where(region == 'Asia', 0.3, 0.1)] = np.nan
+        exit_rates = rng.random(n_rows)
+        exit_rates[rng.random(n_rows) < 0.08] = np.nan
+        self.df = pd.DataFrame({
+            'duration': duration,
+            'exit_rates': exit_rates,
+            'complete': rng.random(n_rows),
+            'region': region,
+            'month': pd.Categorical(rng.choice(['May', 'Nov', 'Dec'], n_rows)),
+            'weekend': rng.random(n_rows) < 0.23,
+        })
+        self.df.loc[rng.random(n_rows) < 0.05, 'month'] = np.nan
+
+    def expected(self, column_name, categorical_column):
+        contingency_table = pd.crosstab(self.df[column_name].isnull(), self.df[categorical_column])
+        chi2, p_value, dof, _ = stats.chi2_contingency(contingency_table)
+        return chi2, p_value, dof
+
+    def test_matches_chi2_contingency(self):
+        results = chi_squared_missingness(self.df, categorical_columns=['region', 'month', 'weekend'])
+        # Four columns with nulls against three categorical columns, less the two columns tested against themselves.
+        self.assertEqual(len(results), 10)
+        for row in results.itertuples():
+            chi2, p_value, dof = self.expected(row.column, row.categorical_column)
+            with self.subTest(column=row.column, categorical_column=row.categorical_column):
+                self.assertAlmostEqual(row.chi2, chi2, places=9)
+                self.assertAlmostEqual(row.p_value, p_value, places=9)
+                self.assertEqual(row.dof, dof)
+
+    def test_yates_correction_with_one_degree_of_freedom(self):
+        chi2, p_value, dof = chi_squared_pair(self.df, 'duration', 'weekend')
+        expected_chi2, expected_p_value, expected_dof = self.expected('duration', 'weekend')
+        self.assertEqual(dof, 1)
+        self.assertEqual(expected_dof, 1)
+        self.assertAlmostEqual(chi2, expected_chi2, places=9)
+        self.assertAlmostEqual(p_value, expected_p_value, places=9)
+
+    def test_categorical_column_with_nulls(self):
+        for categorical_column in ['region', 'month']:
+            with self.subTest(categorical_column=categorical_column):
+                chi2, p_value, dof = chi_squared_pair(self.df, 'duration', categorical_column)
+                expected_chi2, expected_p_value, expected_dof = self.expected('duration', categorical_column)
+                self.assertAlmostEqual(chi2, expected_chi2, places=9)
+                self.assertAlmostEqual(p_value, expected_p_value, places=9)
+                self.assertEqual(dof, expected_dof)
+
+    def test_column_without_nulls(self):
+        chi2, p_value, dof = chi_squared_pair(self.df, 'complete', 'region')
+        self.assertEqual((chi2, p_value, dof), self.expected('complete', 'region'))
+        self.assertEqual((chi2, p_value, dof), (0.0, 1.0, 0))
+
+    def test_column_against_itself(self):
+        self.assertEqual(chi_squared_pair(self.df, 'region', 'region'), (0.0, 1.0, 0))
+        self.assertEqual(self.expected('region', 'region')[:2], (0.0, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()
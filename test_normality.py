@@ -0,0 +1,77 @@
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import stats
+from normality import k2_statistic, normality_tests
+
+class NormalityTestsTest(unittest.TestCase):
+    '''
+    Tests that the vectorised battery in normality_tests() matches scipy and Pandas run on the non-null values of one column at a time.
+    '''
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n_rows = 1500
+        normal = rng.normal(10, 2, n_rows)
+        skewed = rng.lognormal(1, 0.6, n_rows)
+        # Skewed enough that the Anderson-Darling statistic is far beyond the range of its p-value approximation.
+        heavy = rng.lognormal(0, 2.5, n_rows)
+        for values, fraction in [(normal, 0.05), (skewed, 0.2), (heavy, 0.1)]:
+            values[rng.random(n_rows) < fraction] = np.nan
+        self.df = pd.DataFrame({
+            'normal': normal,
+            'skewed': skewed,
+            'heavy': heavy,
+            'region': rng.choice(['Asia', 'Africa', 'Oceania'], n_rows),
+        })
+        self.columns = ['normal', 'skewed', 'heavy']
+
+    def test_matches_scipy_and_pandas(self):
+        results = normality_tests(self.df).set_index('column')
+        self.assertEqual(list(results.index), self.columns)
+        for column in self.columns:
+            series = self.df[column]
+            values = series.dropna().to_numpy()
+            row = results.loc[column]
+            with self.subTest(column=column):
+                k2, k2_p_value = stats.normaltest(values)
+                shapiro_w, shapiro_p_value = stats.shapiro(values)
+                self.assertEqual(row['transform'], 'none')
+                self.assertEqual(row['n'], len(values))
+                self.assertAlmostEqual(row['skew'], series.skew(), places=9)
+                self.assertAlmostEqual(row['kurtosis'], series.kurt(), places=9)
+                self.assertAlmostEqual(row['k2'], k2, delta=1e-9 * max(1, k2))
+                self.assertAlmostEqual(row['k2_p_value'], k2_p_value, places=9)
+                # Every value is within the Shapiro-Wilk sample size, so no sampling takes place.
+                self.assertAlmostEqual(row['shapiro_w'], shapiro_w, places=9)
+                self.assertAlmostEqual(row['shapiro_p_value'], shapiro_p_value, places=9)
+                self.assertAlmostEqual(row['anderson_darling'], stats.anderson(values).statistic, delta=1e-9 * max(1, row['anderson_darling']))
+                self.assertGreaterEqual(row['anderson_darling_p_value'], 0)
+                self.assertLessEqual(row['anderson_darling_p_value'], 1)
+
+    def test_anderson_darling_p_value_for_large_statistic(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            results = normality_tests(self.df, columns=['heavy']).iloc[0]
+        self.assertGreater(results['anderson_darling'], 10)
+        self.assertEqual(results['anderson_darling_p_value'], 0.0)
+
+    def test_k2_statistic(self):
+        values = self.df[self.columns].to_numpy(dtype=np.float64)
+        k2, p_value = k2_statistic(values)
+        for position, column in enumerate(self.columns):
+            expected_k2, expected_p_value = stats.normaltest(self.df[column].dropna())
+            with self.subTest(column=column):
+                self.assertAlmostEqual(k2[position], expected_k2, delta=1e-9 * max(1, expected_k2))
+                self.assertAlmostEqual(p_value[position], expected_p_value, places=9)
+
+    def test_transforms(self):
+        results = normality_tests(self.df, columns=['skewed'], transforms=['log', 'box-cox']).set_index('transform')
+        values = self.df['skewed'].dropna().to_numpy()
+        for transform, transformed in [('log', np.log(values)), ('box-cox', stats.boxcox(values)[0])]:
+            with self.subTest(transform=transform):
+                self.assertAlmostEqual(results.loc[transform, 'skew'], pd.Series(transformed).skew(), places=9)
+                self.assertAlmostEqual(results.loc[transform, 'k2'], stats.normaltest(transformed).statistic, places=6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import numpy as np
+from lazy_import import LazyImport
+
+pd = LazyImport('pandas')
+
+def _selection_key(values, largest):
+    # Larger key = better; nulls get -inf so they are never selected.
+    key = np.asarray(values, dtype=np.float64)
+    key = key if largest else -key
+    return np.where(np.isnan(key), -np.inf, key)
+
+def _group_codes(groups):
+    # Integer code of each row's group (-1 for nulls) and the label of each code.
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        return groups.cat.codes.to_numpy().astype(np.int64), pd.Index(groups.cat.categories)
+    codes, labels = pd.factorize(groups, sort=True)
+    return codes.astype(np.int64), pd.Index(labels)
+
+def top_k_indices(values, k, largest=True):
+    '''
+    Function to find the positions of the k largest (or smallest) values in O(n) with np.argpartition, instead of sorting every value.
+    Null values are never selected.
+
+    Parameters:
+        values (Pandas Series/array): Values to select from.
+        k (int): Number of values to select.
+        largest (bool): Whether to select the largest (True) or smallest (False) values.
+
+    Returns:
+        np.ndarray of row positions, best first.
+    '''
+    key = _selection_key(values, largest)
+    if k <= 0 or len(key) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(key):
+        candidates = np.argpartition(-key, k - 1)[:k]
+    else:
+        candidates = np.arange(len(key))
+    # Only the k candidates are sorted.
+    candidates = candidates[np.argsort(-key[candidates], kind='stable')]
+    return candidates[key[candidates] > -np.inf]
+
+def group_top_k_indices(group_codes, values, k=1, largest=True):
+    '''
+    Function to find the positions of the k largest (or smallest) values within each group in O(n * k), using grouped maximum reductions instead of a sort.
+
+    Parameters:
+        group_codes (np.ndarray): Integer group code of each row (-1 rows are ignored).
+        values (Pandas Series/array): Values to select from.
+        k (int): Number of values to select from each group.
+        largest (bool): Whether to select the largest (True) or smallest (False) values.
+
+    Returns:
+        np.ndarray of row positions, ordered by group code and best first within each group.
+    '''
+    key = _selection_key(values, largest)
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+    n_groups = int(group_codes.max()) + 1 if len(group_codes) else 0
+    # Rows without a group are moved to a dummy group that is never selected.
+    key = np.where(group_codes < 0, -np.inf, key)
+    codes = np.where(group_codes < 0, n_groups, group_codes)
+    selected = []
+    for rank in range(k):
+        best = np.full(n_groups + 1, -np.inf)
+        np.maximum.at(best, codes, key)
+        hits = np.flatnonzero((key == best[codes]) & (key > -np.inf))
+        # First row reaching the group's best value.
+        first = np.full(n_groups + 1, len(key), dtype=np.int64)
+        np.minimum.at(first, codes[hits], hits)
+        chosen = first[:n_groups][first[:n_groups] < len(key)]
+        if len(chosen) == 0:
+            break
+        selected.append(chosen)
+        key[chosen] = -np.inf
+    if not selected:
+        return np.empty(0, dtype=np.int64)
+    positions = np.concatenate(selected)
+    rank = np.repeat(np.arange(len(selected)), [len(chosen) for chosen in selected])
+    return positions[np.lexsort((rank, codes[positions]))]
+
+def top_k(df_name, column_name, k=5, columns=None, largest=True):
+    '''
+    Function to return the rows of a df with the k largest (or smallest) values of a column, e.g. the sessions with the most administrative_duration.
+    Equivalent to df.sort_values(column_name, ascending=not largest).head(k), but only the selected rows are copied.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        column_name (str): Column header to rank by.
+        k (int): Number of rows to return.
+        columns (list of str): Columns to return (defaults to all columns).
+        largest (bool): Whether to return the largest (True) or smallest (False) values.
+
+    Returns:
+        Pandas df of the selected rows, best first.
+    '''
+    positions = top_k_indices(df_name[column_name].to_numpy(dtype=np.float64, na_value=np.nan), k, largest)
+    result = df_name.iloc[positions]
+    return result if columns is None else result[columns]
+
+def group_top_k(df_name, group_column, column_name, k=1, columns=None, largest=True):
+    '''
+    Function to return the rows of a df with the k largest (or smallest) values of a column within each group, e.g. the traffic type with the highest bounce rate in each region.
+    Equivalent to sorting the df by the column and keeping the first k rows of each group, without sorting.
+
+    Parameters:
+        df_name (Pandas df): Pandas df
+        group_column (str): Column header to group by.
+        column_name (str): Column header to rank by.
+        k (int): Number of rows to return from each group.
+        columns (list of str): Columns to return (defaults to all columns).
+        largest (bool): Whether to return the largest (True) or smallest (False) values.
+
+    Returns:
+        Pandas df of the selected rows, ordered by group and best first within each group.
+    '''
+    codes = _group_codes(df_name[group_column])[0]
+    positions = group_top_k_indices(codes, df_name[column_name].to_numpy(dtype=np.float64, na_value=np.nan), k, largest)
+    result = df_name.iloc[positions]
+    return result if columns is None else result[columns]
+
+class StreamingTopK():
+    '''
+    This class is used to keep the k rows with the largest (or smallest) values of a column over a stream of df chunks, overall or within each group.
+    Each chunk is reduced to its own top k with np.argpartition before entering a bounded heap, so memory is O(k) per group.
+
+    ------------------
+    Parameters:
+    column_name: str
+        Column header to rank by.
+    k: int
+        Number of rows to keep (per group).
+    group_column: str (optional)
+        Column header to group by.
+    columns: list of str (optional)
+        Columns of each kept row to store (defaults to all columns).
+    largest: bool
+        Whether to keep the largest (True) or smallest (False) values.
+
+    ------------------
+    Methods:
+    update()
+        Adds a chunk (Pandas df) to the stream.
+    result()
+        Returns the kept rows as a Pandas df.
+    '''
+    def __init__(self, column_name, k=5, group_column=None, columns=None, largest=True):
+        self.column_name = column_name
+        self.k = k
+        self.group_column = group_column
+        self.columns = columns
+        self.largest = largest
+        self._heaps = {}
+        # Tie-breaker so rows with equal values keep their arrival order and are never compared directly.
+        self._counter = itertools.count()
+
+    def update(self, chunk):
+        '''
+        This method adds a chunk to the stream.
+
+        Parameters:
+            chunk (Pandas df): Pandas df containing the ranking (and group) column.
+
+        Returns:
+            The StreamingTopK, to allow chaining.
+        '''
+        values = chunk[self.column_name].to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.group_column is None:
+            positions = top_k_indices(values, self.k, self.largest)
+            groups = [None] * len(positions)
+        else:
+            codes, labels = _group_codes(chunk[self.group_column])
+            positions = group_top_k_indices(codes, values, self.k, self.largest)
+            groups = labels.take(codes[positions]).tolist()
+        keys = _selection_key(values[positions], self.largest)
+        selected = chunk.iloc[positions] if self.columns is None else chunk.iloc[positions][self.columns]
+        for key, group, row in zip(keys, groups, selected.to_dict('records')):
+            heap = self._heaps.setdefault(group, [])
+            item = (key, -next(self._counter), row)
+            if len(heap) < self.k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return self
+
+    def result(self):
+        '''
+        This method returns the kept rows.
+
+        Returns:
+            Pandas df of the kept rows, ordered by group and best first within each group.
+        '''
+        rows = []
+        for group in sorted(self._heaps, key=lambda group: (group is None, group)):
+            rows += [row for key, order, row in sorted(self._heaps[group], reverse=True)]
+        return pd.DataFrame(rows)
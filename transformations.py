@@ -1,7 +1,13 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import PowerTransformer
+from instrumentation import instrument_class
+from lazy_import import LazyImport
+import topk
 
+# sklearn is only needed for yeo_or_boxcox_transformation(), so it is imported on first use:
+PowerTransformer = LazyImport('sklearn.preprocessing', 'PowerTransformer')
+
+@instrument_class
 class DataTransform():
     '''
     This class is used to change the data type of specified column(s) to a new data type.
@@ -102,6 +108,7 @@ class DataTransform():
         for arg in args:
             self.df_name[arg] = self.df_name[arg].dt.total_seconds()
 
+@instrument_class
 class DataFrameTransform():
     '''
     This class is used to change the dataframe (df).
@@ -140,6 +147,14 @@ class DataFrameTransform():
         Transforms or inverse_transforms the data using either the Yeo-Johnson or Box-Cox method.
     replacement_categories()
         Replaces specified categories within a column with a new category and returns the value counts for the specified column once replacement has taken place.
+    segment_categories()
+        Replaces the categories within a column with the segments of a SegmentTaxonomy and returns the value counts of the segments.
+    segment_counts()
+        Returns the number of rows in each segment of a SegmentTaxonomy without changing or copying the df.
+    top_k()
+        Returns the rows with the k largest (or smallest) values of a column, without sorting the df.
+    group_top_k()
+        Returns the rows with the k largest (or smallest) values of a column within each group, without sorting the df.
     '''
     def __init__(self, df_name):
         self.df_name = df_name
@@ -286,7 +301,6 @@ class DataFrameTransform():
                 # Reverse transform the transformed DataFrame
                 self.df_name[[column]] = power_transformer.inverse_transform(self.df_name[[column]])
                 print(f"Skewness of {column} after {method} inverse transformation: {self.df_name[column].skew()}")
-                        
         return self.df_name
             
     def replace_categories(self, column_name, list_category_to_replace, replacement_category):
@@ -305,3 +319,68 @@ class DataFrameTransform():
         ''' 
         self.df_name[column_name] = self.df_name[column_name].replace(list_category_to_replace, replacement_category)
         return self.df_name[column_name].value_counts()
+
+    def segment_categories(self, taxonomy, new_column_name=None):
+        '''
+        This method replaces the categories within a column with the segments of a SegmentTaxonomy (see segments.py), e.g. operating systems with Desktop and Mobile.
+        Categories not listed in the taxonomy are replaced with its "everything else" segment.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            taxonomy (SegmentTaxonomy): Segment definitions for the column
+            new_column_name (str): Name of a new column for the segments (the original column is replaced if None)
+        
+        Returns:
+            The value counts for the segments.
+        '''
+        column_name = new_column_name or taxonomy.column_name
+        self.df_name[column_name] = taxonomy.apply(self.df_name)
+        return self.df_name[column_name].value_counts()
+
+    def segment_counts(self, taxonomy):
+        '''
+        This method returns the number of rows in each segment of a SegmentTaxonomy (see segments.py) without changing or copying the df.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            taxonomy (SegmentTaxonomy): Segment definitions for the column
+        
+        Returns:
+            The number of rows in each segment.
+        '''
+        return taxonomy.counts(self.df_name)
+
+    def top_k(self, column_name, k=5, columns=None, largest=True):
+        '''
+        This method returns the rows with the k largest (or smallest) values of a column, e.g. the sessions with the most administrative_duration.
+        Equivalent to sort_values(column_name).head(k), but runs in linear time and only copies the selected rows.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            column_name (str): Column header to rank by
+            k (int): Number of rows to return
+            columns (list of str): Columns to return (defaults to all columns)
+            largest (bool): Whether to return the largest (True) or smallest (False) values
+        
+        Returns:
+            A df of the selected rows, best first.
+        '''
+        return topk.top_k(self.df_name, column_name, k, columns, largest)
+
+    def group_top_k(self, group_column, column_name, k=1, columns=None, largest=True):
+        '''
+        This method returns the rows with the k largest (or smallest) values of a column within each group, e.g. the traffic type with the highest bounce rate in each region.
+        Equivalent to sorting by column_name and dropping duplicates of group_column, but runs in linear time and only copies the selected rows.
+
+        Parameters:
+            df_name (Pandas df): Pandas df
+            group_column (str): Column header to group by
+            column_name (str): Column header to rank by
+            k (int): Number of rows to return from each group
+            columns (list of str): Columns to return (defaults to all columns)
+            largest (bool): Whether to return the largest (True) or smallest (False) values
+        
+        Returns:
+            A df of the selected rows, ordered by group and best first within each group.
+        '''
+        return topk.group_top_k(self.df_name, group_column, column_name, k, columns, largest)